@@ -0,0 +1,125 @@
+"""
+cache.py - In-process cache for mapping API results
+
+This module provides an exact-match cache for PerformMapping results, so that
+re-running a mapping on identical inputs (same groups, prompt and model
+parameters) returns immediately instead of repeating the API call.
+
+Features:
+- Content-hash keys (blake2b over the serialized request inputs)
+- Bounded LRU eviction with optional per-entry expiry (TTL)
+- Thread-safe operations
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+from core.logger import get_logger
+
+try:
+    import orjson
+except ImportError:  # orjson is optional - fall back to the stdlib encoder
+    orjson = None
+
+logger = get_logger(__name__)
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    Build a stable cache key from JSON-serializable request inputs.
+
+    Each part is serialized and fed to the hash separately, so large groups are
+    never concatenated into one intermediate buffer.
+
+    Args:
+        *parts: Values that fully determine the request (groups, prompt, parameters);
+            bytes parts (e.g. pre-serialized groups) are hashed as-is
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, str):
+            tag, chunk = b"s", part.encode("utf-8")
+        elif isinstance(part, bytes):
+            tag, chunk = b"b", part
+        elif orjson is not None:
+            tag, chunk = b"j", orjson.dumps(part, option=orjson.OPT_SORT_KEYS)
+        else:
+            tag, chunk = b"j", json.dumps(part, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        # Type tag and length prefix keep parts unambiguous ("ab","c" vs "a","bc")
+        hasher.update(tag + len(chunk).to_bytes(8, "little"))
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class MappingCache:
+    """
+    Bounded LRU cache of mapping results.
+
+    Attributes:
+        max_entries: Maximum number of cached results before eviction
+        ttl_seconds: Seconds an entry stays valid (None = never expires)
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (time.monotonic() expiry or None, result)
+        self._entries: "OrderedDict[str, Tuple[Optional[float], Dict]]" = OrderedDict()
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a cached result.
+
+        Args:
+            key: Key from make_cache_key()
+
+        Returns:
+            dict: Cached result, or None on a miss or expired entry
+        """
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: Dict):
+        """
+        Store a result, evicting the least recently used entry when full.
+
+        Args:
+            key: Key from make_cache_key()
+            value: Result dictionary to cache
+        """
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else None
+        with self.lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all cached results"""
+        with self.lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            logger.info("[+] Mapping cache cleared")
+
+    def __len__(self) -> int:
+        return len(self._entries)
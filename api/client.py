@@ -1,19 +1,148 @@
 # api_mapping.py
+import asyncio
 import json
+import logging
+import re
 import time
-from typing import Any, Dict, List, Optional
-from openai import OpenAI, AuthenticationError, RateLimitError, APIConnectionError, APITimeoutError, BadRequestError
+import threading
+import weakref
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+from openai import AsyncOpenAI, BadRequestError, OpenAI
 from colorama import Fore
-import traceback
-import sys
 
 from core.config import Config
-from services.optimization_utils import create_compact_item, expand_compact_result
-from core.logger import get_logger, log_api_call, log_exception
-from api.utils import retry_with_backoff
+from services.optimization_utils import expand_compact_mapping
+from core.logger import get_logger, log_api_call
+from api.utils import DEFAULT_RETRY_CONFIG, aretry_with_backoff
+from api.rate_limiter import RateLimiter
+from api.cache import MappingCache, make_cache_key
+
+try:
+    from orjson import dumps as _odumps, loads as _jloads
+except ImportError:  # orjson is optional - fall back to the stdlib codec
+    _odumps = None
+    _jloads = json.loads
 
 logger = get_logger(__name__)
 
+# Precompiled patterns for safe_print() and parse_optimized_response()
+_ANSI_RE = re.compile(r'\x1b\[[0-9;]+m')
+_CODE_BLOCK_RE = re.compile(r'```(?:json)?\s*([\s\S]*?)\s*```')
+_MAPPINGS_ARRAY_RE = re.compile(r'"mappings"\s*:\s*\[')
+
+# Decoder for pulling a single JSON value out of surrounding text (raw_decode)
+_JSON_DECODER = json.JSONDecoder()
+
+# Shared API clients keyed by (provider, api_key) - see _get_cached_client()
+_CLIENT_CACHE: Dict[Tuple[str, str], OpenAI] = {}
+_CACHE_LOCK = threading.Lock()
+
+# Shared AsyncOpenAI clients: event loop -> {(provider, api_key): client}
+_ASYNC_CLIENT_CACHE = weakref.WeakKeyDictionary()
+
+# (provider, model) pairs that rejected response_format=json_object - these
+# are called in text mode directly instead of failing a request first
+_JSON_MODE_UNSUPPORTED = set()
+_JSON_MODE = {"type": "json_object"}
+
+# Results of previous identical mapping requests - see PerformMapping()
+_RESULT_CACHE = MappingCache(max_entries=Config.result_cache_size, ttl_seconds=Config.result_cache_ttl)
+
+
+def _jdump_bytes(obj) -> bytes:
+    """Serialize obj to compact UTF-8 JSON bytes (no spaces, non-ASCII kept as-is)."""
+    if _odumps is not None:
+        return _odumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode("utf-8")
+
+
+def serialize_group_rows(group: List[Dict]) -> List[bytes]:
+    """
+    Serialize each row of a group to compact JSON bytes.
+
+    Batches that share rows can then be assembled with join_group_rows()
+    instead of serializing the same rows again for every batch.
+
+    Args:
+        group: List of group items
+
+    Returns:
+        list: One JSON fragment per row
+    """
+    return [_jdump_bytes(row) for row in group]
+
+
+def join_group_rows(fragments: List[bytes]) -> bytes:
+    """
+    Join row fragments from serialize_group_rows() into a JSON array.
+
+    The result is byte-for-byte what serializing the list of rows would give.
+    """
+    return b"[" + b",".join(fragments) + b"]"
+
+
+# Fixed prompt text around the serialized groups, as UTF-8 bytes
+_COMPACT_PROMPT_HEAD = (
+    b"Map items from Group1 to Group2. Each item has 'c'(code) and 'n'(name).\n\n"
+    b"Return JSON object with 'mappings' array. Each mapping:\n"
+    b'{"fc":"<first_code>","fn":"<first_name>","sc":"<second_code>","sn":"<second_name>","s":<score_1-100>,"r":"<reason>"}\n\n'
+    b"If no match: sc and sn should be null, s should be <"
+)
+_COMPACT_PROMPT_GROUP1 = b".\n\nGroup1:\n"
+_COMPACT_PROMPT_GROUP2 = b"\n\nGroup2:\n"
+_COMPACT_PROMPT_TAIL = b"\n\nMap ALL Group1 items. Return only JSON."
+_STANDARD_PROMPT_GROUP1 = b"\n\nFIRST_GROUP:\n"
+_STANDARD_PROMPT_GROUP2 = b"\n\nSECOND_GROUP:\n"
+_STANDARD_PROMPT_TAIL = b"\n\nReturn JSON object with 'mappings' array containing all mappings. Use threshold: "
+
+
+@lru_cache(maxsize=8)
+def _threshold_prompt_parts(threshold) -> Tuple[bytes, bytes]:
+    """
+    Return the threshold-dependent prompt fragments for a threshold value.
+
+    Returns:
+        tuple: (compact prompt text before Group1 data, standard prompt ending)
+    """
+    threshold_bytes = str(threshold).encode("utf-8")
+    return (_COMPACT_PROMPT_HEAD + threshold_bytes + _COMPACT_PROMPT_GROUP1,
+            _STANDARD_PROMPT_TAIL + threshold_bytes)
+
+
+@lru_cache(maxsize=16)
+def _system_message(use_compact: bool, threshold) -> str:
+    """Return the system message for the prompt format and threshold."""
+    if use_compact:
+        return f"You are a laboratory mapping expert. Use the exact abbreviated JSON format specified. Be concise. Apply threshold {threshold} for similarity scores."
+    return f"You are a world-class Laboratory Mapping expert. Return valid JSON with all mappings. Apply threshold {threshold} for similarity scores."
+
+
+def _build_prompt_bytes(first_json: bytes, second_json: bytes,
+                        prompt: str, use_compact: bool) -> bytes:
+    """
+    Build the user prompt as UTF-8 bytes with a single join.
+
+    The groups arrive already serialized; the compact prompt replaces the
+    user prompt with a fixed abbreviated instruction.
+    """
+    compact_head, standard_tail = _threshold_prompt_parts(Config.threshold)
+    if use_compact:
+        parts = (
+            compact_head, first_json,
+            _COMPACT_PROMPT_GROUP2, second_json,
+            _COMPACT_PROMPT_TAIL
+        )
+    else:
+        parts = (
+            b"\n", prompt.encode("utf-8"),
+            _STANDARD_PROMPT_GROUP1, first_json,
+            _STANDARD_PROMPT_GROUP2, second_json,
+            standard_tail
+        )
+    return b"".join(parts)
+
 
 def safe_print(*args, **kwargs):
     """
@@ -33,17 +162,86 @@ def safe_print(*args, **kwargs):
             # Extract message from args
             message = ' '.join(str(arg) for arg in args)
             # Clean ANSI color codes for logger
-            import re
-            clean_message = re.sub(r'\x1b\[[0-9;]+m', '', message)
+            clean_message = _ANSI_RE.sub('', message)
             logger.debug(f"[print suppressed in async context] {clean_message}")
         else:
             # Re-raise if it's a different error
             raise
 
 
+def _get_cached_client(provider: str, api_key: str) -> OpenAI:
+    """
+    Return a shared OpenAI client for (provider, api_key).
+
+    Reusing one client keeps its httpx connection pool alive across calls, so
+    steady-state requests skip the TCP/TLS handshake.
+    """
+    key = (provider, api_key)
+    with _CACHE_LOCK:
+        client = _CLIENT_CACHE.get(key)
+        if client is None:
+            http_client = httpx.Client(limits=httpx.Limits(
+                max_keepalive_connections=32,
+                max_connections=64,
+                keepalive_expiry=60.0
+            ))
+            if provider == "OpenRouter":
+                # OpenRouter uses OpenAI-compatible API
+                client = OpenAI(
+                    api_key=api_key,
+                    base_url="https://openrouter.ai/api/v1",
+                    http_client=http_client
+                )
+            else:
+                client = OpenAI(api_key=api_key, http_client=http_client)
+
+            # A new key replaces the provider's previous one (the user changed
+            # it in the sidebar). The stale client is only evicted, not closed:
+            # other threads may still be mid-request on it
+            for stale_key in [k for k in _CLIENT_CACHE if k[0] == provider]:
+                del _CLIENT_CACHE[stale_key]
+            _CLIENT_CACHE[key] = client
+        return client
+
+
+def _get_cached_async_client(provider: str, api_key: str) -> AsyncOpenAI:
+    """
+    Return a shared AsyncOpenAI client for (provider, api_key) on the running loop.
+
+    An async connection pool belongs to the event loop that created it, so
+    clients are cached per loop and dropped together with it.
+    """
+    loop = asyncio.get_running_loop()
+    key = (provider, api_key)
+    with _CACHE_LOCK:
+        loop_clients = _ASYNC_CLIENT_CACHE.setdefault(loop, {})
+        client = loop_clients.get(key)
+        if client is None:
+            http_client = httpx.AsyncClient(limits=httpx.Limits(
+                max_keepalive_connections=32,
+                max_connections=64,
+                keepalive_expiry=60.0
+            ))
+            if provider == "OpenRouter":
+                client = AsyncOpenAI(
+                    api_key=api_key,
+                    base_url="https://openrouter.ai/api/v1",
+                    http_client=http_client
+                )
+            else:
+                client = AsyncOpenAI(api_key=api_key, http_client=http_client)
+
+            # Drop clients for a replaced key (closing them needs an await;
+            # their connections are released when they are collected)
+            for stale_key in [k for k in loop_clients if k[0] == provider]:
+                del loop_clients[stale_key]
+            loop_clients[key] = client
+        return client
+
+
 def get_api_client() -> tuple[Optional[OpenAI], Optional[str], str]:
     """
-    Initialize and return the appropriate API client based on provider.
+    Return the (cached) API client for the configured provider.
 
     Returns:
         tuple: (client, api_key, provider_name)
@@ -54,27 +252,247 @@ def get_api_client() -> tuple[Optional[OpenAI], Optional[str], str]:
     if Config.provider == "OpenRouter":
         if not Config.openrouter_api_key:
             return None, None, "OpenRouter"
-        # OpenRouter uses OpenAI-compatible API
-        client = OpenAI(
-            api_key=Config.openrouter_api_key,
-            base_url="https://openrouter.ai/api/v1"
-        )
+        client = _get_cached_client("OpenRouter", Config.openrouter_api_key)
         return client, Config.openrouter_api_key, "OpenRouter"
     else:
         # Default to OpenAI
         if not Config.api_key:
             return None, None, "OpenAI"
-        client = OpenAI(api_key=Config.api_key)
+        client = _get_cached_client("OpenAI", Config.api_key)
         return client, Config.api_key, "OpenAI"
 
 
+def get_async_api_client() -> tuple[Optional[AsyncOpenAI], Optional[str], str]:
+    """
+    Return the (cached) async API client for the configured provider.
+
+    Must be called from a running event loop.
+
+    Returns:
+        tuple: (client, api_key, provider_name) - see get_api_client()
+    """
+    provider = "OpenRouter" if Config.provider == "OpenRouter" else "OpenAI"
+    api_key = Config.openrouter_api_key if provider == "OpenRouter" else Config.api_key
+    if not api_key:
+        return None, None, provider
+    return _get_cached_async_client(provider, api_key), api_key, provider
+
+
+def _lookup_cached_result(first_json: bytes, second_json: bytes,
+                          prompt: str, use_compact: bool) -> Tuple[Optional[str], Optional[Dict]]:
+    """
+    Look up a previous result for an identical mapping request.
+
+    Returns:
+        tuple: (cache_key, result) - cache_key is None when caching is disabled,
+            result is None on a miss
+    """
+    if not Config.use_result_cache:
+        return None, None
+    # With temperature > 0 a repeat request would sample a new answer, so only
+    # reuse results when that is explicitly allowed
+    if Config.temperature != 0 and not Config.cache_sampled_results:
+        return None, None
+
+    # Identical inputs and parameters produce the same request, so serve a
+    # previous result instead of calling the API again
+    cache_key = make_cache_key(
+        first_json, second_json, prompt, use_compact, Config.abbreviate_keys,
+        Config.provider, Config.model, Config.temperature, Config.top_p,
+        Config.max_tokens, Config.threshold
+    )
+    cached = _RESULT_CACHE.get(cache_key)
+    if cached is None:
+        return cache_key, None
+
+    logger.info(f"[+] Cache hit - reusing {len(cached['mappings'])} mappings without an API call")
+    return cache_key, {
+        "mappings": list(cached["mappings"]),
+        "response": None,
+        "elapsed_time": 0.0,
+        "response_text": cached["response_text"],
+        "parameters_used": dict(cached["parameters_used"]),
+        "cached": True
+    }
+
+
+def _prepare_api_params(first_json: bytes, second_json: bytes, prompt: str,
+                        use_compact: bool, verbose: bool, provider_name: str) -> Dict:
+    """
+    Build the chat completion parameters for a mapping request.
+
+    Returns:
+        dict: Keyword arguments for client.chat.completions.create (without response_format)
+    """
+    # Read the settings once - the same values are used throughout
+    provider, model, threshold = Config.provider, Config.model, Config.threshold
+
+    # Prepare optimized prompt based on format
+    prompt_bytes = _build_prompt_bytes(first_json, second_json, prompt, use_compact)
+    optimized_prompt = prompt_bytes.decode("utf-8")
+
+    if verbose and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Optimized prompt preview (first 500 chars):")
+        logger.debug(f"{prompt_bytes[:500].decode('utf-8', errors='ignore')}...")
+        logger.debug(f"Optimized prompt length: {len(optimized_prompt)} characters")
+        logger.debug(f"Estimated tokens: ~{len(optimized_prompt)//4}")
+
+    # Prepare API call
+    logger.debug(f"API call: {provider_name} | Model: {model} | Optimization: {'COMPACT' if use_compact else 'STANDARD'}")
+
+    # System message based on mode
+    system_msg = _system_message(use_compact, threshold)
+
+    # Prepare base parameters
+    api_params = {
+        "model": model,
+        "messages": [
+            {
+                "role": "system",
+                "content": system_msg
+            },
+            {
+                "role": "user",
+                "content": optimized_prompt
+            }
+        ],
+        "temperature": Config.temperature,
+        "top_p": Config.top_p,
+    }
+
+    # Use max_completion_tokens for newer OpenAI models (gpt-4o, gpt-5, o1, o3, etc.)
+    # These models don't support the older max_tokens parameter
+    needs_new_token_param = (
+        provider == "OpenAI" and
+        model.lower().startswith(("gpt-4o", "gpt-5", "o1", "o3"))
+    )
+
+    if needs_new_token_param:
+        api_params["max_completion_tokens"] = Config.max_tokens
+    else:
+        api_params["max_tokens"] = Config.max_tokens
+
+    # Add OpenRouter-specific headers if using OpenRouter
+    if provider == "OpenRouter":
+        api_params["extra_headers"] = {
+            "HTTP-Referer": "https://mapping-medical-services.streamlit.app",
+            "X-Title": "Medical Mapping Service"
+        }
+
+    return api_params
+
+
+def _finalize_response(response, elapsed_time: float, use_compact: bool,
+                       verbose: bool, cache_key: Optional[str]) -> Optional[Dict]:
+    """
+    Log, parse and cache a completed chat completion.
+
+    Returns:
+        Dictionary with mapping results (see PerformMapping) or None if parsing failed
+    """
+    provider, model, temperature, top_p = Config.provider, Config.model, Config.temperature, Config.top_p
+
+    # Log successful API call
+    log_api_call(
+        logger,
+        provider=provider,
+        model=model,
+        tokens={
+            'input': response.usage.prompt_tokens,
+            'output': response.usage.completion_tokens,
+            'total': response.usage.total_tokens
+        },
+        latency=elapsed_time,
+        success=True
+    )
+
+    logger.info(f"[+] API call completed in {elapsed_time:.2f} seconds")
+    logger.debug(f"  - Model used: {model}")
+    logger.debug(f"  - Temperature used: {temperature}")
+    logger.debug(f"  - Top P used: {top_p}")
+
+    # Check for truncation
+    finish_reason = response.choices[0].finish_reason
+    if finish_reason == "length":
+        logger.warning(f"[!] Response was truncated (max_tokens reached)")
+
+    # Extract response
+    response_text = response.choices[0].message.content
+
+    if verbose and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Response preview (first 500 chars):")
+        logger.debug(f"{response_text[:500]}...")
+
+    # Parse JSON response
+    mapping_results = parse_optimized_response(response_text, use_compact, verbose)
+
+    if mapping_results is None:
+        return None
+
+    logger.info(f"[+] Successfully parsed {len(mapping_results)} mappings")
+    # Also print to stdout for Streamlit console capture
+    safe_print(f"{Fore.GREEN}[+] Successfully parsed {len(mapping_results)} mappings")
+
+    # If using compact format with abbreviated keys, expand results
+    # (checked once per response rather than per item)
+    if use_compact and Config.abbreviate_keys:
+        mapping_results = [expand_compact_mapping(item) for item in mapping_results]
+
+    parameters_used = {
+        "provider": provider,
+        "model": model,
+        "temperature": temperature,
+        "top_p": top_p,
+        "max_tokens": Config.max_tokens,
+        "threshold": Config.threshold
+    }
+
+    # Cache only complete responses - a truncated one should be retried
+    if cache_key is not None and finish_reason != "length":
+        _RESULT_CACHE.put(cache_key, {
+            "mappings": list(mapping_results),
+            "response_text": response_text,
+            "parameters_used": dict(parameters_used)
+        })
+
+    # Return raw data for processing in another module
+    return {
+        "mappings": mapping_results,
+        "response": response,
+        "elapsed_time": elapsed_time,
+        "response_text": response_text,
+        "parameters_used": parameters_used,
+        "cached": False
+    }
+
+
+def _remember_json_mode_unsupported(json_mode_key: Tuple[str, str]):
+    """Record that a model only works without response_format (text mode)"""
+    if json_mode_key not in _JSON_MODE_UNSUPPORTED:
+        _JSON_MODE_UNSUPPORTED.add(json_mode_key)
+        logger.warning(f"Note: JSON format enforcement not supported by {json_mode_key[1]}, using text mode")
+
+
+def _log_mapping_error(e: Exception, verbose: bool):
+    """Log a failed mapping request"""
+    logger.error(f"[X] Error during API call: {str(e)}")
+    logger.debug(f"  - Model attempted: {Config.model}")
+    logger.debug(f"  - Temperature: {Config.temperature}")
+    logger.debug(f"  - Top P: {Config.top_p}")
+    if verbose:
+        # exc_info defers traceback formatting to the handlers that emit it
+        logger.debug(f"Traceback:", exc_info=True)
+
+
 def PerformMapping(first_group: List[Dict],
                    second_group: List[Dict],
                    prompt: str,
                    verbose: bool = True,
                    use_compact: bool = True,
                    full_format_first: List[Dict] = None,
-                   full_format_second: List[Dict] = None) -> Optional[Dict]:
+                   full_format_second: List[Dict] = None,
+                   first_group_json: Optional[bytes] = None,
+                   second_group_json: Optional[bytes] = None) -> Optional[Dict]:
     """
     Performs the actual mapping using OpenAI or OpenRouter API with optimized token usage.
     Uses parameters from Config which are set by the user in Streamlit.
@@ -87,15 +505,22 @@ def PerformMapping(first_group: List[Dict],
         use_compact: If True, uses compact JSON format
         full_format_first: Full format of first group for result processing
         full_format_second: Full format of second group for result processing
+        first_group_json: first_group already serialized to compact JSON bytes
+            (e.g. with join_group_rows), so it is not serialized again
+        second_group_json: second_group already serialized, as first_group_json
 
     Returns:
-        Dictionary with mapping results or None if error
+        Dictionary with mapping results or None if error. When Config.use_result_cache
+        is enabled, temperature is 0 (or Config.cache_sampled_results is set) and an
+        identical request was answered within Config.result_cache_ttl seconds, the
+        stored result is returned with "cached": True, "response": None and
+        elapsed_time 0.0.
     """
 
-    safe_print(f"\n{Fore.MAGENTA}{'='*60}")
     logger.info(f"Starting Mapping Process (Optimized)")
-    Config.log_configuration()
-    safe_print(f"{Fore.MAGENTA}{'='*60}\n")
+    if verbose:
+        # The dispatcher logs the configuration once per run, not per batch
+        Config.log_configuration()
 
     # Get API client based on provider
     client, api_key, provider_name = get_api_client()
@@ -105,213 +530,215 @@ def PerformMapping(first_group: List[Dict],
         logger.debug(f"Please set your {provider_name} API key")
         return None
 
+    # Serialize each group once - the same bytes feed the cache key and the prompt
+    if first_group_json is None:
+        first_group_json = _jdump_bytes(first_group)
+    if second_group_json is None:
+        second_group_json = _jdump_bytes(second_group)
+
+    cache_key, cached = _lookup_cached_result(first_group_json, second_group_json, prompt, use_compact)
+    if cached is not None:
+        return cached
+
     try:
         logger.info(f"[+] {provider_name} client initialized")
-        
-        # Prepare optimized prompt based on format
-        if use_compact:
-            # Create ultra-compact prompt
-            optimized_prompt = f"""Map items from Group1 to Group2. Each item has 'c'(code) and 'n'(name).
+        api_params = _prepare_api_params(first_group_json, second_group_json, prompt,
+                                         use_compact, verbose, provider_name)
 
-Return JSON object with 'mappings' array. Each mapping:
-{{"fc":"<first_code>","fn":"<first_name>","sc":"<second_code>","sn":"<second_name>","s":<score_1-100>,"r":"<reason>"}}
+        start_time = time.time()
 
-If no match: sc and sn should be null, s should be <{Config.threshold}.
+        # Make API call with user-defined parameters
+        json_mode_key = (Config.provider, Config.model)
+        if json_mode_key in _JSON_MODE_UNSUPPORTED:
+            response = client.chat.completions.create(**api_params)
+        else:
+            try:
+                response = client.chat.completions.create(**api_params, response_format=_JSON_MODE)
+            except BadRequestError:
+                # Fallback without response_format (some models don't support it).
+                # Only a rejected request is retried - other errors would fail again
+                response = client.chat.completions.create(**api_params)
+                _remember_json_mode_unsupported(json_mode_key)
 
-Group1:
-{json.dumps(first_group, ensure_ascii=False, separators=(',', ':'))}
+        elapsed_time = time.time() - start_time
+        return _finalize_response(response, elapsed_time, use_compact, verbose, cache_key)
 
-Group2:
-{json.dumps(second_group, ensure_ascii=False, separators=(',', ':'))}
+    except Exception as e:
+        _log_mapping_error(e, verbose)
+        return None
 
-Map ALL Group1 items. Return only JSON."""
-        else:
-            # Standard format prompt
-            optimized_prompt = f"""
-{prompt}
-
-FIRST_GROUP:
-{json.dumps(first_group, ensure_ascii=False, separators=(',', ':'))}
-
-SECOND_GROUP:
-{json.dumps(second_group, ensure_ascii=False, separators=(',', ':'))}
-
-Return JSON object with 'mappings' array containing all mappings. Use threshold: {Config.threshold}"""
-        
-        if verbose:
-            safe_print(f"\n{Fore.CYAN}Optimized Prompt Preview (first 500 chars):")
-            logger.debug(f"{optimized_prompt[:500]}...")
-            safe_print(f"\n{Fore.WHITE}Optimized prompt length: {len(optimized_prompt)} characters")
-            logger.debug(f"Estimated tokens: ~{len(optimized_prompt)//4}")
-        
-        # Prepare API call
-        safe_print(f"\n{Fore.YELLOW}Calling {provider_name} API...")
-        logger.debug(f"API call: {provider_name} | Model: {Config.model} | Optimization: {'COMPACT' if use_compact else 'STANDARD'}")
 
-        start_time = time.time()
+async def PerformMappingAsync(first_group: List[Dict],
+                              second_group: List[Dict],
+                              prompt: str,
+                              verbose: bool = False,
+                              use_compact: bool = True,
+                              rate_limiter: Optional[RateLimiter] = None,
+                              first_group_json: Optional[bytes] = None,
+                              second_group_json: Optional[bytes] = None) -> Optional[Dict]:
+    """
+    Async version of PerformMapping using AsyncOpenAI.
 
-        # System message based on mode
-        if use_compact:
-            system_msg = f"You are a laboratory mapping expert. Use the exact abbreviated JSON format specified. Be concise. Apply threshold {Config.threshold} for similarity scores."
-        else:
-            system_msg = f"You are a world-class Laboratory Mapping expert. Return valid JSON with all mappings. Apply threshold {Config.threshold} for similarity scores."
-
-        # Prepare base parameters
-        api_params = {
-            "model": Config.model,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": system_msg
-                },
-                {
-                    "role": "user",
-                    "content": optimized_prompt
-                }
-            ],
-            "temperature": Config.temperature,
-            "top_p": Config.top_p,
-        }
+    The request is awaited on the event loop instead of blocking a thread, and
+    transient API errors are retried with asyncio.sleep between attempts. Prompt
+    serialization and response parsing run in worker threads so they overlap
+    with the network I/O of other concurrent requests.
 
-        # Use max_completion_tokens for newer OpenAI models (gpt-4o, gpt-5, o1, o3, etc.)
-        # These models don't support the older max_tokens parameter
-        model_lower = Config.model.lower()
-        needs_new_token_param = (
-            Config.provider == "OpenAI" and
-            any(model_lower.startswith(prefix) for prefix in ["gpt-4o", "gpt-5", "o1", "o3"])
+    Args:
+        first_group: List of First Group items (compact or full format)
+        second_group: List of Second Group items (compact or full format)
+        prompt: Prompt text for the mapping
+        verbose: If True, prints detailed information
+        use_compact: If True, uses compact JSON format
+        rate_limiter: Optional RateLimiter to update from the x-ratelimit-limit-*
+            response headers
+        first_group_json: first_group already serialized to compact JSON bytes,
+            so it is not serialized again
+        second_group_json: second_group already serialized, as first_group_json
+
+    Returns:
+        Dictionary with mapping results or None if error (see PerformMapping)
+    """
+    client, api_key, provider_name = get_async_api_client()
+
+    if not api_key:
+        logger.error(f"[X] Error: {provider_name} API key not found")
+        logger.debug(f"Please set your {provider_name} API key")
+        return None
+
+    # Serializing and hashing the groups is CPU work - run it in a worker
+    # thread so other requests on the event loop keep sending and receiving
+    if first_group_json is None or second_group_json is None:
+        first_group_json, second_group_json = await asyncio.to_thread(
+            lambda: (first_group_json or _jdump_bytes(first_group),
+                     second_group_json or _jdump_bytes(second_group))
         )
+    cache_key, cached = await asyncio.to_thread(
+        _lookup_cached_result, first_group_json, second_group_json, prompt, use_compact
+    )
+    if cached is not None:
+        return cached
 
-        if needs_new_token_param:
-            api_params["max_completion_tokens"] = Config.max_tokens
-        else:
-            api_params["max_tokens"] = Config.max_tokens
+    try:
+        api_params = await asyncio.to_thread(
+            _prepare_api_params, first_group_json, second_group_json, prompt,
+            use_compact, verbose, provider_name
+        )
 
-        # Add OpenRouter-specific headers if using OpenRouter
-        if Config.provider == "OpenRouter":
-            api_params["extra_headers"] = {
-                "HTTP-Referer": "https://mapping-medical-services.streamlit.app",
-                "X-Title": "Medical Mapping Service"
-            }
+        @aretry_with_backoff(
+            max_retries=DEFAULT_RETRY_CONFIG.max_retries,
+            base_delay=DEFAULT_RETRY_CONFIG.base_delay,
+            max_delay=DEFAULT_RETRY_CONFIG.max_delay,
+            backoff_factor=DEFAULT_RETRY_CONFIG.backoff_factor,
+            jitter=DEFAULT_RETRY_CONFIG.jitter
+        )
+        async def _create(**kwargs):
+            raw = await client.chat.completions.with_raw_response.create(**api_params, **kwargs)
+            if rate_limiter is not None:
+                rate_limiter.update_from_headers(raw.headers)
+            return raw.parse()
 
-        # Make API call with user-defined parameters
-        try:
-            response = client.chat.completions.create(
-                **api_params,
-                response_format={"type": "json_object"}
-            )
-        except Exception as e:
-            # Fallback without response_format (some models don't support it)
-            logger.warning(f"Note: JSON format enforcement not supported, using text mode")
-            response = client.chat.completions.create(**api_params)
-        
-        elapsed_time = time.time() - start_time
+        start_time = time.time()
 
-        # Log successful API call
-        log_api_call(
-            logger,
-            provider=Config.provider,
-            model=Config.model,
-            tokens={
-                'input': response.usage.prompt_tokens,
-                'output': response.usage.completion_tokens,
-                'total': response.usage.total_tokens
-            },
-            latency=elapsed_time,
-            success=True
+        json_mode_key = (Config.provider, Config.model)
+        if json_mode_key in _JSON_MODE_UNSUPPORTED:
+            response = await _create()
+        else:
+            try:
+                response = await _create(response_format=_JSON_MODE)
+            except BadRequestError:
+                # Fallback without response_format (some models don't support it)
+                response = await _create()
+                _remember_json_mode_unsupported(json_mode_key)
+
+        elapsed_time = time.time() - start_time
+        return await asyncio.to_thread(
+            _finalize_response, response, elapsed_time, use_compact, verbose, cache_key
         )
 
-        logger.info(f"[+] API call completed in {elapsed_time:.2f} seconds")
-        logger.debug(f"  - Model used: {Config.model}")
-        logger.debug(f"  - Temperature used: {Config.temperature}")
-        logger.debug(f"  - Top P used: {Config.top_p}")
-
-        # Check for truncation
-        finish_reason = response.choices[0].finish_reason
-        if finish_reason == "length":
-            logger.warning(f"[!] Response was truncated (max_tokens reached)")
-
-        # Extract response
-        response_text = response.choices[0].message.content
-        
-        if verbose:
-            safe_print(f"\n{Fore.CYAN}Response preview (first 500 chars):")
-            logger.debug(f"{response_text[:500]}...")
-        
-        # Parse JSON response
-        mapping_results = parse_optimized_response(response_text, use_compact, verbose)
-        
-        if mapping_results is None:
-            return None
-
-        logger.info(f"[+] Successfully parsed {len(mapping_results)} mappings")
-        # Also print to stdout for Streamlit console capture
-        safe_print(f"{Fore.GREEN}[+] Successfully parsed {len(mapping_results)} mappings")
-
-        # If using compact format, expand results
-        if use_compact:
-            expanded_results = []
-            for item in mapping_results:
-                expanded = expand_compact_result(item, "mapping")
-                expanded_results.append(expanded)
-            mapping_results = expanded_results
-        
-        # Return raw data for processing in another module
-        return {
-            "mappings": mapping_results,
-            "response": response,
-            "elapsed_time": elapsed_time,
-            "response_text": response_text,
-            "parameters_used": {
-                "provider": Config.provider,
-                "model": Config.model,
-                "temperature": Config.temperature,
-                "top_p": Config.top_p,
-                "max_tokens": Config.max_tokens,
-                "threshold": Config.threshold
-            }
-        }
-            
     except Exception as e:
-        logger.error(f"[X] Error during API call: {str(e)}")
-        logger.debug(f"  - Model attempted: {Config.model}")
-        logger.debug(f"  - Temperature: {Config.temperature}")
-        logger.debug(f"  - Top P: {Config.top_p}")
-        if verbose:
-            logger.warning(f"Traceback:")
-            safe_print(traceback.format_exc())
+        _log_mapping_error(e, verbose)
         return None
 
 
+def _decode_array_prefix(text: str, start: int) -> Tuple[List[Any], bool]:
+    """
+    Decode the elements of the JSON array that opens at text[start].
+
+    Decoding stops at the first element that is not valid JSON, so a truncated
+    array yields all elements before the cut.
+
+    Args:
+        text: Text containing the array
+        start: Index of the opening '['
+
+    Returns:
+        tuple: (elements, complete) - complete is True if the closing ']' was reached
+    """
+    items = []
+    length = len(text)
+    idx = start + 1
+    while True:
+        while idx < length and text[idx] in ' \t\r\n':
+            idx += 1
+        if idx >= length:
+            return items, False
+        if text[idx] == ']':
+            return items, True
+        try:
+            item, idx = _JSON_DECODER.raw_decode(text, idx)
+        except json.JSONDecodeError:
+            return items, False
+        items.append(item)
+        while idx < length and text[idx] in ' \t\r\n':
+            idx += 1
+        if idx < length and text[idx] == ',':
+            idx += 1
+        elif idx < length and text[idx] == ']':
+            return items, True
+        else:
+            return items, False
+
+
 def parse_optimized_response(response_text: str, is_compact: bool, verbose: bool) -> Optional[List[Dict]]:
-    """Parse response based on format (compact or standard)"""
+    """
+    Parse response based on format (compact or standard).
 
-    import re
+    orjson.JSONDecodeError subclasses json.JSONDecodeError, so the except
+    clauses below catch decode failures from either backend.
+    """
 
     mapping_results = None
     cleaned_text = response_text.strip()
 
-    # Step 1: Remove markdown code blocks if present
-    # Handle ```json ... ``` or ``` ... ```
-    code_block_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', cleaned_text)
-    if code_block_match:
-        cleaned_text = code_block_match.group(1).strip()
-        if verbose:
-            logger.debug(f"Extracted content from markdown code block")
-
-    # Step 2: Try direct JSON parsing
+    # Step 1: Try direct JSON parsing - responses from JSON mode are already
+    # plain JSON, so the markdown regex below is only needed on failure
+    parsed_json = None
     try:
-        parsed_json = json.loads(cleaned_text)
-
+        parsed_json = _jloads(cleaned_text)
+    except json.JSONDecodeError:
+        # Step 2: Remove markdown code blocks if present and parse again
+        # Handle ```json ... ``` or ``` ... ```
+        code_block_match = _CODE_BLOCK_RE.search(cleaned_text)
+        if code_block_match:
+            cleaned_text = code_block_match.group(1).strip()
+            if verbose:
+                logger.debug(f"Extracted content from markdown code block")
+            try:
+                parsed_json = _jloads(cleaned_text)
+            except json.JSONDecodeError:
+                pass
+
+    if parsed_json is not None:
         # Extract mappings
         if isinstance(parsed_json, dict) and "mappings" in parsed_json:
             mapping_results = parsed_json["mappings"]
             logger.info(f"[+] Found mappings in JSON object")
-            safe_print(f"{Fore.GREEN}[+] Found mappings in JSON object")
         elif isinstance(parsed_json, list):
             mapping_results = parsed_json
             logger.info(f"[+] Response is a direct JSON array")
 
-    except json.JSONDecodeError as e:
+    else:
         logger.warning(f"JSON parse error, attempting extraction...")
 
         # Step 3: Try to find JSON object with balanced braces
@@ -324,118 +751,42 @@ def parse_optimized_response(response_text: str, is_compact: bool, verbose: bool
             # Find the opening brace before "mappings"
             start_idx = cleaned_text.rfind('{', 0, mappings_idx)
             if start_idx != -1:
-                # Find matching closing brace using bracket counting
-                brace_count = 0
-                end_idx = start_idx
-                for i in range(start_idx, len(cleaned_text)):
-                    char = cleaned_text[i]
-                    if char == '{':
-                        brace_count += 1
-                    elif char == '}':
-                        brace_count -= 1
-                        if brace_count == 0:
-                            end_idx = i + 1
-                            break
-
-                if end_idx > start_idx:
-                    try:
-                        json_str = cleaned_text[start_idx:end_idx]
-                        parsed_obj = json.loads(json_str)
+                # raw_decode parses one value from start_idx and ignores any
+                # trailing text, so the C scanner finds the matching brace
+                try:
+                    parsed_obj, _ = _JSON_DECODER.raw_decode(cleaned_text, start_idx)
+                    if isinstance(parsed_obj, dict):
                         mapping_results = parsed_obj.get("mappings", [])
                         logger.info(f"[+] Extracted mappings using bracket matching")
-                    except json.JSONDecodeError:
-                        pass
-
-        # Step 4: Try to extract just the array if object parsing failed
-        if mapping_results is None:
-            # Look for array after "mappings":
-            array_match = re.search(r'"mappings"\s*:\s*(\[[\s\S]*\])', cleaned_text)
-            if array_match:
-                array_str = array_match.group(1)
-                # Find balanced array using bracket counting
-                bracket_count = 0
-                end_idx = 0
-                for i, char in enumerate(array_str):
-                    if char == '[':
-                        bracket_count += 1
-                    elif char == ']':
-                        bracket_count -= 1
-                        if bracket_count == 0:
-                            end_idx = i + 1
-                            break
-
-                if end_idx > 0:
-                    try:
-                        balanced_array = array_str[:end_idx]
-                        mapping_results = json.loads(balanced_array)
-                        logger.info(f"[+] Extracted mappings array directly")
-                    except json.JSONDecodeError:
-                        pass
-
-    # Step 5: If still no results, try to repair truncated JSON
-    if mapping_results is None:
-        logger.warning(f"Attempting to repair truncated JSON...")
-
-        # Show end of response to diagnose truncation
-        logger.debug(f"Response ending (last 300 chars):")
-        logger.debug(f"...{cleaned_text[-300:]}")
-
-        # Try to repair by closing unclosed brackets
-        repaired_text = cleaned_text
-
-        # Count unclosed brackets
-        open_braces = repaired_text.count('{') - repaired_text.count('}')
-        open_brackets = repaired_text.count('[') - repaired_text.count(']')
-
-        if open_braces > 0 or open_brackets > 0:
-            logger.warning(f"Found unclosed: {open_braces} braces, {open_brackets} brackets")
-
-            # Find the last complete mapping object
-            # Look for the last complete object pattern
-            last_complete_match = None
-            for match in re.finditer(r'\}(?=\s*,|\s*\])', repaired_text):
-                last_complete_match = match
-
-            if last_complete_match:
-                # Truncate at the last complete object and close the structure
-                truncate_pos = last_complete_match.end()
-                repaired_text = repaired_text[:truncate_pos]
-
-                # Recalculate unclosed brackets after truncation
-                open_braces = repaired_text.count('{') - repaired_text.count('}')
-                open_brackets = repaired_text.count('[') - repaired_text.count(']')
-
-                # Close any remaining open brackets
-                repaired_text += ']' * max(0, open_brackets) + '}' * max(0, open_braces)
-
-                try:
-                    parsed_json = json.loads(repaired_text)
-                    if isinstance(parsed_json, dict) and "mappings" in parsed_json:
-                        mapping_results = parsed_json["mappings"]
-                        logger.info(f"[+] Repaired truncated JSON, recovered {len(mapping_results)} mappings")
-                    elif isinstance(parsed_json, list):
-                        mapping_results = parsed_json
-                        logger.info(f"[+] Repaired truncated array, recovered {len(mapping_results)} mappings")
                 except json.JSONDecodeError:
-                    # Try simpler repair: just close brackets at the end
-                    simple_repair = cleaned_text.rstrip()
-                    # Remove any trailing incomplete object/text
-                    if simple_repair.endswith(','):
-                        simple_repair = simple_repair[:-1]
-                    simple_repair += ']}'
-
-                    try:
-                        parsed_json = json.loads(simple_repair)
-                        if isinstance(parsed_json, dict) and "mappings" in parsed_json:
-                            mapping_results = parsed_json["mappings"]
-                            logger.info(f"[+] Simple repair succeeded, recovered {len(mapping_results)} mappings")
-                    except json.JSONDecodeError:
-                        pass
+                    pass
+
+    # Step 4: Decode the mappings array element by element. This recovers every
+    # complete mapping from a response that was cut off mid-array
+    if mapping_results is None:
+        array_match = _MAPPINGS_ARRAY_RE.search(cleaned_text)
+        if array_match:
+            array_start = array_match.end() - 1
+        elif cleaned_text.startswith('['):
+            array_start = 0
+        else:
+            array_start = -1
+
+        if array_start != -1:
+            items, complete = _decode_array_prefix(cleaned_text, array_start)
+            if complete:
+                mapping_results = items
+                logger.info(f"[+] Extracted mappings array directly")
+            elif items:
+                mapping_results = items
+                logger.warning(f"[!] Response was truncated, recovered {len(items)} complete mappings")
+                logger.debug(f"Response ending (last 300 chars):")
+                logger.debug(f"...{cleaned_text[-300:]}")
 
     if mapping_results is None:
         logger.error(f"[X] Could not parse mapping results")
-        if verbose:
-            safe_print(f"\n{Fore.YELLOW}Response (first 1000 chars):")
+        if verbose and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Response (first 1000 chars):")
             logger.debug(f"{response_text[:1000]}")
         return None
 
@@ -12,15 +12,24 @@ Features:
 - Thread-safe operations
 """
 
+import asyncio
+import logging
 import time
-from typing import Dict, List, Tuple
-from dataclasses import dataclass
-from datetime import datetime, timedelta
-from threading import RLock
+from collections import deque
+from typing import Deque, Dict, Mapping, Optional, Tuple
+from threading import Lock
 from core.logger import get_logger
 
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional - estimate_tokens falls back to len/4
+    tiktoken = None
+
 logger = get_logger(__name__)
 
+# tiktoken encoders by model name (None when tiktoken cannot serve the model)
+_ENCODERS: Dict[str, object] = {}
+
 
 # Model limits - RPM (Requests Per Minute) and TPM (Tokens Per Minute)
 # OpenAI Tier 3 limits - ALL models have RPM = 5,000
@@ -58,17 +67,6 @@ MODEL_LIMITS = {
 }
 
 
-@dataclass
-class RequestRecord:
-    """Record of a single API request"""
-    timestamp: float  # Unix timestamp
-    tokens_used: int  # Total tokens (input + output)
-
-    def is_expired(self, window_seconds: float = 60.0) -> bool:
-        """Check if this record is older than the window"""
-        return time.time() - self.timestamp > window_seconds
-
-
 class RateLimiter:
     """
     Rate limiter for API calls with RPM and TPM tracking.
@@ -103,21 +101,35 @@ class RateLimiter:
         self.window_seconds = window_seconds
         self.model_name = model_name or "unknown"
 
-        self.requests: List[RequestRecord] = []
-        self.lock = RLock()  # Thread-safe operations (reentrant lock for nested calls)
+        # Request history as parallel deques in timestamp order (time.monotonic()
+        # timestamp, total tokens); expired entries are popped from the left
+        self._timestamps: Deque[float] = deque()
+        self._tokens: Deque[int] = deque()
+        self._token_sum = 0  # Running total of self._tokens
+        self.lock = Lock()  # Thread-safe operations (never re-acquired while held)
 
         logger.info(f"[+] Rate limiter initialized for {self.model_name}")
-        logger.debug(f"  - RPM limit: {self.rpm_limit:,}")
-        logger.debug(f"  - TPM limit: {self.tpm_limit:,}")
-        logger.debug(f"  - Window: {self.window_seconds}s")
-
-    def _cleanup_old_records(self):
-        """Remove expired records outside the time window"""
-        current_time = time.time()
-        self.requests = [
-            r for r in self.requests
-            if not r.is_expired(self.window_seconds)
-        ]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"  - RPM limit: {self.rpm_limit:,}")
+            logger.debug(f"  - TPM limit: {self.tpm_limit:,}")
+            logger.debug(f"  - Window: {self.window_seconds}s")
+
+    def _cleanup_old_records(self, now: float) -> Tuple[int, int]:
+        """
+        Remove expired records outside the time window. Caller must hold self.lock.
+
+        Args:
+            now: Current time.monotonic() reading, taken once by the caller
+
+        Returns:
+            tuple: (current_rpm, current_tpm) after cleanup
+        """
+        timestamps = self._timestamps
+        cutoff = now - self.window_seconds
+        while timestamps and timestamps[0] < cutoff:
+            timestamps.popleft()
+            self._token_sum -= self._tokens.popleft()
+        return len(timestamps), self._token_sum
 
     def get_current_usage(self) -> Tuple[int, int]:
         """
@@ -126,13 +138,9 @@ class RateLimiter:
         Returns:
             tuple: (current_rpm, current_tpm)
         """
+        now = time.monotonic()
         with self.lock:
-            self._cleanup_old_records()
-
-            current_rpm = len(self.requests)
-            current_tpm = sum(r.tokens_used for r in self.requests)
-
-            return current_rpm, current_tpm
+            return self._cleanup_old_records(now)
 
     def get_usage_percentage(self) -> Tuple[float, float]:
         """
@@ -141,11 +149,12 @@ class RateLimiter:
         Returns:
             tuple: (rpm_percentage, tpm_percentage)
         """
-        current_rpm, current_tpm = self.get_current_usage()
+        return self._to_percentages(*self.get_current_usage())
 
+    def _to_percentages(self, current_rpm: int, current_tpm: int) -> Tuple[float, float]:
+        """Convert usage counts to percentages of the configured limits"""
         rpm_pct = (current_rpm / self.rpm_limit * 100) if self.rpm_limit > 0 else 0
         tpm_pct = (current_tpm / self.tpm_limit * 100) if self.tpm_limit > 0 else 0
-
         return rpm_pct, tpm_pct
 
     def can_make_request(self, estimated_tokens: int = 0) -> Tuple[bool, str]:
@@ -160,11 +169,9 @@ class RateLimiter:
                 - can_proceed: True if request can be made
                 - reason: Explanation if request cannot be made
         """
+        now = time.monotonic()
         with self.lock:
-            self._cleanup_old_records()
-
-            current_rpm = len(self.requests)
-            current_tpm = sum(r.tokens_used for r in self.requests)
+            current_rpm, current_tpm = self._cleanup_old_records(now)
 
             # Check RPM limit
             if current_rpm >= self.rpm_limit:
@@ -187,53 +194,114 @@ class RateLimiter:
         Args:
             tokens_used: Total tokens used (input + output)
         """
+        now = time.monotonic()
         with self.lock:
-            record = RequestRecord(
-                timestamp=time.time(),
-                tokens_used=tokens_used
-            )
-            self.requests.append(record)
+            self._timestamps.append(now)
+            self._tokens.append(tokens_used)
+            self._token_sum += tokens_used
 
-            # Log usage after recording
-            current_rpm, current_tpm = self.get_current_usage()
-            rpm_pct = (current_rpm / self.rpm_limit * 100) if self.rpm_limit > 0 else 0
-            tpm_pct = (current_tpm / self.tpm_limit * 100) if self.tpm_limit > 0 else 0
+            # Log usage after recording (skipped entirely unless DEBUG is enabled)
+            if logger.isEnabledFor(logging.DEBUG):
+                current_rpm, current_tpm = self._cleanup_old_records(now)
+                rpm_pct, tpm_pct = self._to_percentages(current_rpm, current_tpm)
 
-            logger.debug(f"Request recorded: {tokens_used:,} tokens")
-            logger.debug(f"  - RPM: {current_rpm}/{self.rpm_limit} ({rpm_pct:.1f}%)")
-            logger.debug(f"  - TPM: {current_tpm:,}/{self.tpm_limit:,} ({tpm_pct:.1f}%)")
+                logger.debug(f"Request recorded: {tokens_used:,} tokens")
+                logger.debug(f"  - RPM: {current_rpm}/{self.rpm_limit} ({rpm_pct:.1f}%)")
+                logger.debug(f"  - TPM: {current_tpm:,}/{self.tpm_limit:,} ({tpm_pct:.1f}%)")
 
-    def wait_if_needed(self, estimated_tokens: int = 0) -> float:
+    def _calculate_wait(self, estimated_tokens: int) -> Tuple[float, str]:
         """
-        Wait if necessary to respect rate limits.
+        Work out how long to wait before a request can be made.
 
         Args:
             estimated_tokens: Estimated tokens for the next request
 
         Returns:
-            float: Seconds waited (0 if no wait needed)
+            tuple: (wait_seconds, reason) - wait_seconds is 0.0 if no wait is needed
         """
         can_proceed, reason = self.can_make_request(estimated_tokens)
 
         if can_proceed:
-            return 0.0
+            return 0.0, reason
 
         # Calculate how long to wait
         with self.lock:
-            if not self.requests:
-                return 0.0
+            if not self._timestamps:
+                return 0.0, reason
 
             # Wait until the oldest request expires
-            oldest_timestamp = min(r.timestamp for r in self.requests)
-            time_since_oldest = time.time() - oldest_timestamp
+            oldest_timestamp = self._timestamps[0]
+            time_since_oldest = time.monotonic() - oldest_timestamp
             wait_time = max(0, self.window_seconds - time_since_oldest + 1)  # +1 for safety margin
 
         logger.warning(f"[!] Rate limit approaching: {reason}")
         logger.info(f"  Waiting {wait_time:.1f}s before next request...")
+        return wait_time, reason
 
-        time.sleep(wait_time)
+    def wait_if_needed(self, estimated_tokens: int = 0) -> float:
+        """
+        Wait if necessary to respect rate limits.
+
+        Args:
+            estimated_tokens: Estimated tokens for the next request
+
+        Returns:
+            float: Seconds waited (0 if no wait needed)
+        """
+        wait_time, _ = self._calculate_wait(estimated_tokens)
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return wait_time
+
+    async def wait_if_needed_async(self, estimated_tokens: int = 0) -> float:
+        """
+        Async version of wait_if_needed.
+
+        Sleeps with asyncio.sleep, so other requests on the event loop keep
+        running while this one waits for capacity.
+
+        Args:
+            estimated_tokens: Estimated tokens for the next request
+
+        Returns:
+            float: Seconds waited (0 if no wait needed)
+        """
+        wait_time, _ = self._calculate_wait(estimated_tokens)
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
         return wait_time
 
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """
+        Adopt the account's actual limits from API response headers.
+
+        OpenAI reports the limits that apply to the API key in the
+        x-ratelimit-limit-requests and x-ratelimit-limit-tokens headers, which
+        may differ from the MODEL_LIMITS table (e.g. a different usage tier).
+
+        Args:
+            headers: Response headers (case-insensitive mapping)
+        """
+        limits = {}
+        for name, attr in (("x-ratelimit-limit-requests", "rpm_limit"),
+                           ("x-ratelimit-limit-tokens", "tpm_limit")):
+            value = headers.get(name)
+            if value:
+                try:
+                    limits[attr] = int(value)
+                except ValueError:
+                    continue
+
+        with self.lock:
+            changed = {attr: limit for attr, limit in limits.items()
+                       if limit > 0 and limit != getattr(self, attr)}
+            for attr, limit in changed.items():
+                setattr(self, attr, limit)
+
+        if changed:
+            logger.info(f"[+] Rate limits for {self.model_name} updated from API headers: "
+                        f"RPM {self.rpm_limit:,}, TPM {self.tpm_limit:,}")
+
     def get_stats(self) -> Dict:
         """
         Get current rate limiter statistics.
@@ -241,8 +309,12 @@ class RateLimiter:
         Returns:
             dict: Statistics including usage, limits, and percentages
         """
-        current_rpm, current_tpm = self.get_current_usage()
-        rpm_pct, tpm_pct = self.get_usage_percentage()
+        # One lock acquisition so counts, percentages and active_requests agree
+        now = time.monotonic()
+        with self.lock:
+            current_rpm, current_tpm = self._cleanup_old_records(now)
+            active_requests = len(self._timestamps)
+        rpm_pct, tpm_pct = self._to_percentages(current_rpm, current_tpm)
 
         return {
             "model": self.model_name,
@@ -253,16 +325,52 @@ class RateLimiter:
             "tpm_limit": self.tpm_limit,
             "tpm_percentage": tpm_pct,
             "window_seconds": self.window_seconds,
-            "active_requests": len(self.requests)
+            "active_requests": active_requests
         }
 
     def reset(self):
         """Reset all rate limiter records"""
         with self.lock:
-            self.requests.clear()
+            self._timestamps.clear()
+            self._tokens.clear()
+            self._token_sum = 0
             logger.info(f"[+] Rate limiter reset for {self.model_name}")
 
 
+# Lowercased MODEL_LIMITS keys, longest first, so the most specific family
+# wins a partial match (e.g. "gpt-4o-mini" before "gpt-4o" before "gpt-4")
+_MODEL_LIMITS_LOWER = {k.lower(): v for k, v in MODEL_LIMITS.items() if k != "default"}
+_SORTED_KEYS = sorted(_MODEL_LIMITS_LOWER, key=len, reverse=True)
+
+
+def _find_model_limits(model_name: str) -> Tuple[Optional[str], Optional[Dict]]:
+    """
+    Find the MODEL_LIMITS entry for a model name.
+
+    Tries an exact (case-insensitive) match, then the longest known model that
+    prefixes the name, then the longest known model contained in it (e.g.
+    "openai/gpt-4o"), then a known model that extends the name.
+
+    Returns:
+        tuple: (matched_key, limits) or (None, None) if nothing matches
+    """
+    m = model_name.lower()
+    limits = _MODEL_LIMITS_LOWER.get(m)
+    if limits:
+        return m, limits
+
+    for k in _SORTED_KEYS:
+        if m.startswith(k):
+            return k, _MODEL_LIMITS_LOWER[k]
+    for k in _SORTED_KEYS:
+        if k in m:
+            return k, _MODEL_LIMITS_LOWER[k]
+    for k in _SORTED_KEYS:
+        if k.startswith(m):
+            return k, _MODEL_LIMITS_LOWER[k]
+    return None, None
+
+
 def get_rate_limiter_for_model(model_name: str, provider: str = "OpenAI") -> RateLimiter:
     """
     Create a rate limiter configured for a specific model.
@@ -274,16 +382,10 @@ def get_rate_limiter_for_model(model_name: str, provider: str = "OpenAI") -> Rat
     Returns:
         RateLimiter: Configured rate limiter instance
     """
-    # Try to find exact match
-    limits = MODEL_LIMITS.get(model_name)
-
-    # Try partial match for model families
-    if not limits:
-        for known_model, model_limits in MODEL_LIMITS.items():
-            if known_model in model_name.lower() or model_name.lower() in known_model:
-                limits = model_limits
-                logger.info(f"Using limits for similar model: {known_model}")
-                break
+    # Try exact match, then partial match for model families
+    known_model, limits = _find_model_limits(model_name)
+    if limits and known_model != model_name.lower():
+        logger.info(f"Using limits for similar model: {known_model}")
 
     # Fall back to default
     if not limits:
@@ -299,18 +401,66 @@ def get_rate_limiter_for_model(model_name: str, provider: str = "OpenAI") -> Rat
     )
 
 
-def estimate_tokens(text: str) -> int:
+def _get_encoder(model: str):
+    """
+    Return a cached tiktoken encoder for model, or None if unavailable.
+
+    Unknown models use the cl100k_base encoding. A failed lookup (tiktoken not
+    installed, or its BPE file cannot be loaded) is cached as None so the
+    character heuristic is used without retrying on every call.
+    """
+    if model in _ENCODERS:
+        return _ENCODERS[model]
+
+    encoder = None
+    if tiktoken is not None:
+        try:
+            try:
+                encoder = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning(f"[!] tiktoken unavailable for {model}, using character estimate: {e}")
+            encoder = None
+
+    _ENCODERS[model] = encoder
+    return encoder
+
+
+def preload_tokenizer(model: str) -> bool:
     """
-    Estimate token count for text (rough approximation).
+    Load the tiktoken encoder for model ahead of time.
 
-    Uses the common heuristic: 1 token ≈ 4 characters for English text.
+    The first lookup may download the BPE file, so callers with an event loop
+    run this before starting it instead of stalling every in-flight request.
+
+    Args:
+        model: Model name used to pick the tokenizer
+
+    Returns:
+        bool: True if a tiktoken encoder is available for the model
+    """
+    return _get_encoder(model) is not None
+
+
+def estimate_tokens(text: str, model: str = "gpt-4o") -> int:
+    """
+    Estimate token count for text.
+
+    Uses the model's tiktoken encoding when available. Otherwise falls back to
+    the common heuristic: 1 token ≈ 4 characters for English text.
 
     Args:
         text: Input text
+        model: Model name used to pick the tokenizer (default: "gpt-4o")
 
     Returns:
         int: Estimated token count
     """
+    encoder = _get_encoder(model)
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+
     # Rough estimation: 1 token ≈ 4 characters
     return len(text) // 4
 
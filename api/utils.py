@@ -5,17 +5,206 @@ This module provides utilities for making resilient API calls with
 exponential backoff and automatic retry on transient failures.
 """
 
+import asyncio
+import random
+import re
 import time
-from typing import Callable, TypeVar, Tuple
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar, Tuple
 from functools import wraps
-from openai import RateLimitError, APIConnectionError, APITimeoutError, AuthenticationError, BadRequestError
+from openai import (
+    RateLimitError, APIConnectionError, APITimeoutError, AuthenticationError, BadRequestError,
+    NotFoundError, PermissionDeniedError, UnprocessableEntityError
+)
 from core.logger import get_logger
 
+try:
+    from openai import ContentFilterFinishReasonError
+except ImportError:  # Older openai SDKs don't have this error
+    ContentFilterFinishReasonError = None
+
 logger = get_logger(__name__)
 
 # Type variable for generic return type
 T = TypeVar('T')
 
+# Errors that retrying cannot fix - these fail immediately, even if an SDK
+# version also derives them from a retriable exception class
+NON_RETRIABLE_EXCEPTIONS = tuple(exc for exc in (
+    AuthenticationError,
+    BadRequestError,
+    NotFoundError,
+    PermissionDeniedError,
+    UnprocessableEntityError,
+    ContentFilterFinishReasonError
+) if exc is not None)
+
+# Supported jitter modes for backoff delays
+JITTER_MODES = ("full", "equal", "none")
+
+# One component of an x-ratelimit-reset-* duration such as "6m0s" or "250ms"
+_DURATION_PART_RE = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def apply_jitter(delay: float, jitter: str = "full") -> float:
+    """
+    Randomize a backoff delay so concurrent callers do not retry in lockstep.
+
+    Args:
+        delay: Exponential backoff delay in seconds
+        jitter: "full" (uniform in [0, delay]), "equal" (uniform in
+            [delay/2, delay]) or "none" (delay unchanged)
+
+    Returns:
+        float: Delay to actually sleep, in seconds
+    """
+    if jitter == "full":
+        return random.uniform(0, delay)
+    if jitter == "equal":
+        return delay / 2 + random.uniform(0, delay / 2)
+    if jitter == "none":
+        return delay
+    raise ValueError(f"Unknown jitter mode '{jitter}', expected one of {JITTER_MODES}")
+
+
+def _parse_duration(value: str) -> float:
+    """Parse a reset duration like "1s", "6m0s" or "20ms" into seconds (0.0 if invalid)."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    return sum(float(amount) * _DURATION_UNITS[unit]
+               for amount, unit in _DURATION_PART_RE.findall(value))
+
+
+def get_retry_after(exception: Exception) -> float:
+    """
+    Read the server-advertised wait time from an API error response.
+
+    Checks retry-after-ms, retry-after (seconds form) and the OpenAI
+    x-ratelimit-reset-requests / x-ratelimit-reset-tokens headers.
+
+    Args:
+        exception: Exception raised by the API client
+
+    Returns:
+        float: Seconds to wait before retrying (0.0 if no hint was given)
+    """
+    response = getattr(exception, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return 0.0
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass  # HTTP-date form - fall through to the reset headers
+
+    resets = [_parse_duration(headers[name])
+              for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+              if headers.get(name)]
+    return max(resets, default=0.0)
+
+
+@dataclass
+class RetryState:
+    """
+    Retry progress for a single call of a decorated function.
+
+    A fresh instance is created per call, so concurrent calls of the same
+    decorated function never share attempt counters or delays.
+
+    Attributes:
+        delay: Current exponential backoff delay in seconds (before jitter)
+        attempt: Current attempt number (0-indexed)
+        last_exc: Most recent retriable exception, if any
+    """
+    delay: float
+    attempt: int = 0
+    last_exc: Optional[BaseException] = None
+
+
+def _next_retry_sleep(func_name: str, state: RetryState, max_retries: int,
+                      max_delay: float, jitter: str) -> Optional[float]:
+    """
+    Log a retriable failure and compute the wait before the next attempt.
+
+    Returns:
+        float: Seconds to sleep, or None when no attempts are left
+    """
+    exc, attempt = state.last_exc, state.attempt
+    if attempt == max_retries:
+        logger.error(f"[X] Max retries ({max_retries}) exceeded for {func_name}")
+        logger.error(f"  Final error: {type(exc).__name__}: {str(exc)}")
+        return None
+
+    logger.warning(
+        f"[!] Attempt {attempt + 1}/{max_retries + 1} failed: "
+        f"{type(exc).__name__}: {str(exc)}"
+    )
+    # Never retry before the server says the limit resets
+    sleep_for = max(min(get_retry_after(exc), max_delay), apply_jitter(state.delay, jitter))
+    logger.info(f"  Retrying in {sleep_for:.1f}s...")
+    return sleep_for
+
+
+def _is_client_error(exc: Exception) -> bool:
+    """Check for a 4xx status (other than 408 timeout / 429 rate limit) on an API error"""
+    status = getattr(exc, "status_code", None)
+    return isinstance(status, int) and 400 <= status < 500 and status not in (408, 429)
+
+
+def _log_non_retriable(func_name: str, exc: Exception):
+    """Log an error that retrying cannot fix"""
+    logger.error(
+        f"[X] Non-retriable error in {func_name}: "
+        f"{type(exc).__name__}: {str(exc)}"
+    )
+    logger.error("  This error cannot be fixed by retrying")
+
+
+def _handle_attempt_failure(func_name: str, exc: Exception, state: RetryState,
+                            retriable_exceptions: Tuple, max_retries: int,
+                            max_delay: float, jitter: str) -> Optional[float]:
+    """
+    Classify a failed attempt, log it, and compute the wait before the next one.
+
+    Shared by retry_with_backoff and aretry_with_backoff, which differ only in
+    how they call the function and sleep.
+
+    Returns:
+        float: Seconds to sleep before retrying, or None when exc must be re-raised
+    """
+    if isinstance(exc, NON_RETRIABLE_EXCEPTIONS):
+        # Non-retriable exceptions - fail immediately
+        _log_non_retriable(func_name, exc)
+        return None
+
+    if isinstance(exc, retriable_exceptions):
+        if _is_client_error(exc):
+            # A permanent 4xx surfaced through a retriable class
+            _log_non_retriable(func_name, exc)
+            return None
+        state.last_exc = exc
+        return _next_retry_sleep(func_name, state, max_retries, max_delay, jitter)
+
+    # Unexpected exception - fail immediately
+    logger.error(
+        f"[X] Unexpected error in {func_name}: "
+        f"{type(exc).__name__}: {str(exc)}"
+    )
+    return None
+
 
 def retry_with_backoff(
     max_retries: int = 3,
@@ -26,7 +215,8 @@ def retry_with_backoff(
         RateLimitError,
         APIConnectionError,
         APITimeoutError
-    )
+    ),
+    jitter: str = "full"
 ):
     """
     Decorator for retrying functions with exponential backoff.
@@ -41,6 +231,8 @@ def retry_with_backoff(
         max_delay: Maximum delay between retries in seconds (default: 60.0)
         backoff_factor: Multiplier for delay after each retry (default: 2.0)
         retriable_exceptions: Tuple of exceptions to retry on
+        jitter: Jitter mode applied to each delay - "full", "equal" or "none"
+            (default: "full", see apply_jitter)
 
     Returns:
         Decorator function
@@ -52,69 +244,105 @@ def retry_with_backoff(
 
     Behavior:
         - Attempt 1: Immediate call
-        - Attempt 2: Wait base_delay (1.0s)
-        - Attempt 3: Wait base_delay * backoff_factor (2.0s)
-        - Attempt 4: Wait base_delay * backoff_factor^2 (4.0s)
-        - Max delay capped at max_delay
-
-    Non-retriable exceptions (AuthenticationError, BadRequestError):
+        - Attempt 2: Wait up to base_delay (1.0s)
+        - Attempt 3: Wait up to base_delay * backoff_factor (2.0s)
+        - Attempt 4: Wait up to base_delay * backoff_factor^2 (4.0s)
+        - Max delay capped at max_delay; jitter picks the actual wait below it
+        - A Retry-After / x-ratelimit-reset-* header sets the minimum wait
+
+    Non-retriable exceptions (NON_RETRIABLE_EXCEPTIONS and other 4xx statuses
+    except 408/429):
         These fail immediately without retry as they indicate permanent problems.
     """
+    if jitter not in JITTER_MODES:
+        raise ValueError(f"Unknown jitter mode '{jitter}', expected one of {JITTER_MODES}")
+
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
         @wraps(func)
         def wrapper(*args, **kwargs) -> T:
-            delay = base_delay
-            last_exception = None
+            state = RetryState(delay=base_delay)
 
-            for attempt in range(max_retries + 1):
+            for state.attempt in range(max_retries + 1):
                 try:
                     result = func(*args, **kwargs)
-                    if attempt > 0:
-                        logger.info(f"[+] Retry successful on attempt {attempt + 1}/{max_retries + 1}")
+                except Exception as e:
+                    sleep_for = _handle_attempt_failure(func.__name__, e, state, retriable_exceptions,
+                                                        max_retries, max_delay, jitter)
+                    if sleep_for is None:
+                        raise
+
+                    time.sleep(sleep_for)
+
+                    # Exponential backoff with max cap
+                    state.delay = min(state.delay * backoff_factor, max_delay)
+                else:
+                    if state.attempt > 0:
+                        logger.info(f"[+] Retry successful on attempt {state.attempt + 1}/{max_retries + 1}")
                     return result
 
-                except retriable_exceptions as e:
-                    last_exception = e
+        return wrapper
+    return decorator
 
-                    if attempt == max_retries:
-                        logger.error(
-                            f"[X] Max retries ({max_retries}) exceeded for {func.__name__}"
-                        )
-                        logger.error(f"  Final error: {type(e).__name__}: {str(e)}")
-                        raise
 
-                    # Log warning and retry
-                    logger.warning(
-                        f"[!] Attempt {attempt + 1}/{max_retries + 1} failed: "
-                        f"{type(e).__name__}: {str(e)}"
-                    )
-                    logger.info(f"  Retrying in {delay:.1f}s...")
+def aretry_with_backoff(
+    max_retries: int = 3,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+    backoff_factor: float = 2.0,
+    retriable_exceptions: Tuple = (
+        RateLimitError,
+        APIConnectionError,
+        APITimeoutError
+    ),
+    jitter: str = "full"
+):
+    """
+    Async version of retry_with_backoff for coroutine functions.
 
-                    time.sleep(delay)
+    Waits with asyncio.sleep between attempts, so other tasks on the event
+    loop keep running while a request backs off.
 
-                    # Exponential backoff with max cap
-                    delay = min(delay * backoff_factor, max_delay)
+    Args:
+        max_retries: Maximum number of retry attempts (default: 3)
+        base_delay: Initial delay between retries in seconds (default: 1.0)
+        max_delay: Maximum delay between retries in seconds (default: 60.0)
+        backoff_factor: Multiplier for delay after each retry (default: 2.0)
+        retriable_exceptions: Tuple of exceptions to retry on
+        jitter: Jitter mode applied to each delay (default: "full")
 
-                except (AuthenticationError, BadRequestError) as e:
-                    # Non-retriable exceptions - fail immediately
-                    logger.error(
-                        f"[X] Non-retriable error in {func.__name__}: "
-                        f"{type(e).__name__}: {str(e)}"
-                    )
-                    logger.error("  This error cannot be fixed by retrying")
-                    raise
+    Returns:
+        Decorator function
 
+    Example:
+        @aretry_with_backoff(max_retries=3, base_delay=2.0)
+        async def call_api():
+            return await client.chat.completions.create(...)
+    """
+    if jitter not in JITTER_MODES:
+        raise ValueError(f"Unknown jitter mode '{jitter}', expected one of {JITTER_MODES}")
+
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @wraps(func)
+        async def wrapper(*args, **kwargs) -> T:
+            state = RetryState(delay=base_delay)
+
+            for state.attempt in range(max_retries + 1):
+                try:
+                    result = await func(*args, **kwargs)
                 except Exception as e:
-                    # Unexpected exception - fail immediately
-                    logger.error(
-                        f"[X] Unexpected error in {func.__name__}: "
-                        f"{type(e).__name__}: {str(e)}"
-                    )
-                    raise
+                    sleep_for = _handle_attempt_failure(func.__name__, e, state, retriable_exceptions,
+                                                        max_retries, max_delay, jitter)
+                    if sleep_for is None:
+                        raise
 
-            # Should never reach here, but just in case
-            if last_exception:
-                raise last_exception
+                    await asyncio.sleep(sleep_for)
+
+                    # Exponential backoff with max cap
+                    state.delay = min(state.delay * backoff_factor, max_delay)
+                else:
+                    if state.attempt > 0:
+                        logger.info(f"[+] Retry successful on attempt {state.attempt + 1}/{max_retries + 1}")
+                    return result
 
         return wrapper
     return decorator
@@ -171,6 +399,7 @@ class RetryConfig:
         base_delay: Initial delay between retries
         max_delay: Maximum delay between retries
         backoff_factor: Exponential backoff multiplier
+        jitter: Jitter mode for retry delays ("full", "equal" or "none")
     """
 
     def __init__(
@@ -178,12 +407,14 @@ class RetryConfig:
         max_retries: int = 3,
         base_delay: float = 1.0,
         max_delay: float = 60.0,
-        backoff_factor: float = 2.0
+        backoff_factor: float = 2.0,
+        jitter: str = "full"
     ):
         self.max_retries = max_retries
         self.base_delay = base_delay
         self.max_delay = max_delay
         self.backoff_factor = backoff_factor
+        self.jitter = jitter
 
     def get_decorator(self):
         """
@@ -196,7 +427,8 @@ class RetryConfig:
             max_retries=self.max_retries,
             base_delay=self.base_delay,
             max_delay=self.max_delay,
-            backoff_factor=self.backoff_factor
+            backoff_factor=self.backoff_factor,
+            jitter=self.jitter
         )
 
 
@@ -205,7 +437,8 @@ DEFAULT_RETRY_CONFIG = RetryConfig(
     max_retries=3,
     base_delay=2.0,  # Start with 2 second delay
     max_delay=60.0,
-    backoff_factor=2.0
+    backoff_factor=2.0,
+    jitter="full"
 )
 
 
@@ -225,6 +458,8 @@ def is_retriable_error(exception: Exception) -> bool:
         APITimeoutError
     )
 
+    if isinstance(exception, NON_RETRIABLE_EXCEPTIONS) or _is_client_error(exception):
+        return False
     return isinstance(exception, retriable_types)
 
 
@@ -232,7 +467,8 @@ def calculate_backoff_delay(
     attempt: int,
     base_delay: float = 1.0,
     backoff_factor: float = 2.0,
-    max_delay: float = 60.0
+    max_delay: float = 60.0,
+    jitter: str = "full"
 ) -> float:
     """
     Calculate the delay for exponential backoff.
@@ -242,17 +478,18 @@ def calculate_backoff_delay(
         base_delay: Initial delay in seconds
         backoff_factor: Multiplier for each attempt
         max_delay: Maximum delay in seconds
+        jitter: Jitter mode - "full", "equal" or "none" (see apply_jitter)
 
     Returns:
         float: Delay in seconds for this attempt
 
     Example:
-        >>> calculate_backoff_delay(0, 1.0, 2.0, 60.0)  # First retry
+        >>> calculate_backoff_delay(0, 1.0, 2.0, 60.0, jitter="none")  # First retry
         1.0
-        >>> calculate_backoff_delay(1, 1.0, 2.0, 60.0)  # Second retry
+        >>> calculate_backoff_delay(1, 1.0, 2.0, 60.0, jitter="none")  # Second retry
         2.0
-        >>> calculate_backoff_delay(2, 1.0, 2.0, 60.0)  # Third retry
+        >>> calculate_backoff_delay(2, 1.0, 2.0, 60.0, jitter="none")  # Third retry
         4.0
     """
-    delay = base_delay * (backoff_factor ** attempt)
-    return min(delay, max_delay)
+    delay = min(base_delay * (backoff_factor ** attempt), max_delay)
+    return apply_jitter(delay, jitter)
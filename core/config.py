@@ -1,9 +1,32 @@
 # config.py
 import os
+import sys
 from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 
-class Config:
+# Settings resolved from Streamlit secrets / environment on first access
+_LAZY_SETTINGS = frozenset({
+    "settings", "api_key", "openrouter_api_key", "provider", "model",
+    "max_tokens", "temperature", "top_p", "threshold"
+})
+
+
+class _LazySettingsMeta(type):
+    """Metaclass that defers loading secrets-backed settings until first use"""
+
+    def __getattr__(cls, name):
+        # Only reached when normal lookup fails, i.e. before the settings load;
+        # afterwards they are plain class attributes with no extra overhead
+        if name in _LAZY_SETTINGS:
+            cls._load_settings()
+            return type.__getattribute__(cls, name)
+        raise AttributeError(f"type object '{cls.__name__}' has no attribute '{name}'")
+
+
+class Config(metaclass=_LazySettingsMeta):
     """Configuration settings with Streamlit Cloud support"""
 
     # Provider options
@@ -80,6 +103,9 @@ class Config:
             "endpoints": ["/v1/responses"]
         },
     }
+    # Read-only, with interned keys so lookups by these model names hit the
+    # identity fast path
+    OPENAI_MODELS = MappingProxyType({sys.intern(k): v for k, v in OPENAI_MODELS.items()})
 
     # OpenRouter Models with their context window
     # NOTE: OpenAI models are available directly through OpenAI provider above
@@ -136,25 +162,11 @@ class Config:
         "perplexity/llama-3.1-sonar-large-128k-online": {"max_context": 128000, "description": "Sonar Large - Online search"},
         "perplexity/llama-3.1-sonar-small-128k-online": {"max_context": 128000, "description": "Sonar Small - Online search"},
     }
+    OPENROUTER_MODELS = MappingProxyType({sys.intern(k): v for k, v in OPENROUTER_MODELS.items()})
 
-    # For Streamlit Cloud, use secrets management
-    @staticmethod
-    def get_api_key():
-        # Try Streamlit secrets first (for cloud deployment)
-        try:
-            return st.secrets["OPENAI_API_KEY"]
-        except:
-            # Fall back to environment variable (for local)
-            return os.getenv("OPENAI_API_KEY", "")
-
-    @staticmethod
-    def get_openrouter_api_key():
-        # Try Streamlit secrets first (for cloud deployment)
-        try:
-            return st.secrets["OPENROUTER_API_KEY"]
-        except:
-            # Fall back to environment variable (for local)
-            return os.getenv("OPENROUTER_API_KEY", "")
+    # Flat model -> max_context tables for get_model_max_context()
+    _OPENAI_MAX_CONTEXT = {k: v["max_context"] for k, v in OPENAI_MODELS.items()}
+    _OPENROUTER_MAX_CONTEXT = {k: v["max_context"] for k, v in OPENROUTER_MODELS.items()}
 
     # File paths - will be handled by file uploader in Streamlit
     excel_path = None
@@ -163,45 +175,58 @@ class Config:
     # API settings - can be overridden by Streamlit secrets
     @staticmethod
     def get_settings():
+        # Default settings, API keys from environment variables (for local)
+        settings = {
+            "api_key": os.getenv("OPENAI_API_KEY", ""),
+            "openrouter_api_key": os.getenv("OPENROUTER_API_KEY", ""),
+            "provider": "OpenAI",
+            "model": "gpt-4o",
+            "max_tokens": 16000,
+            "temperature": 0.2,
+            "top_p": 0.9,
+            "threshold": 80
+        }
         try:
-            # Try to load from Streamlit secrets
-            return {
-                "api_key": st.secrets.get("OPENAI_API_KEY", ""),
-                "openrouter_api_key": st.secrets.get("OPENROUTER_API_KEY", ""),
-                "provider": st.secrets.settings.get("provider", "OpenAI"),
-                "model": st.secrets.settings.get("model", "gpt-4o"),
-                "max_tokens": st.secrets.settings.get("max_tokens", 16000),
-                "temperature": st.secrets.settings.get("temperature", 0.2),
-                "top_p": st.secrets.settings.get("top_p", 0.9),
-                "threshold": st.secrets.settings.get("threshold", 80)
-            }
-        except:
-            # Default settings
-            return {
-                "api_key": os.getenv("OPENAI_API_KEY", ""),
-                "openrouter_api_key": os.getenv("OPENROUTER_API_KEY", ""),
-                "provider": "OpenAI",
-                "model": "gpt-4o",
-                "max_tokens": 16000,
-                "temperature": 0.2,
-                "top_p": 0.9,
-                "threshold": 80
-            }
+            # Read Streamlit secrets in one pass (for cloud deployment): API
+            # keys override the environment, the [settings] section the defaults
+            secrets = st.secrets
+            if "OPENAI_API_KEY" in secrets:
+                settings["api_key"] = secrets["OPENAI_API_KEY"]
+            if "OPENROUTER_API_KEY" in secrets:
+                settings["openrouter_api_key"] = secrets["OPENROUTER_API_KEY"]
+            if "settings" in secrets:
+                section = secrets["settings"]
+                for name in ("provider", "model", "max_tokens", "temperature", "top_p", "threshold"):
+                    if name in section:
+                        settings[name] = section[name]
+        except (FileNotFoundError, KeyError, StreamlitAPIException):
+            # No secrets file (or an unreadable one) - keep the defaults
+            pass
+        return settings
 
-    # Load settings
-    settings = get_settings.__func__()
-    api_key = get_api_key.__func__()
-    openrouter_api_key = get_openrouter_api_key.__func__()
-    provider = settings.get("provider", "OpenAI")
-    model = settings.get("model", "gpt-4o")
-    max_tokens = settings.get("max_tokens", 16000)
-    temperature = settings.get("temperature", 0.2)
-    top_p = settings.get("top_p", 0.9)
-    threshold = settings.get("threshold", 80)
+    @classmethod
+    def _load_settings(cls):
+        """
+        Load settings from Streamlit secrets (or defaults) into class attributes.
+
+        Called on first access to any of the settings, so importing this module
+        does not touch Streamlit secrets. Values already assigned (e.g. by the
+        UI) are kept.
+        """
+        settings = cls.get_settings()
+        # get_settings() always returns every setting (defaults filled in)
+        loaded = {"settings": settings, **settings}
+        for name, value in loaded.items():
+            if name not in cls.__dict__:
+                setattr(cls, name, value)
 
     # Optimization settings
     use_compact_json = True
     abbreviate_keys = True
+    use_result_cache = True  # Reuse results of identical mapping requests (see api/cache.py)
+    result_cache_size = 256  # Maximum number of cached mapping results
+    result_cache_ttl = 3600.0  # Seconds before a cached mapping result expires
+    cache_sampled_results = False  # Also cache results when temperature > 0 (sampled output)
 
     # Batch settings
     max_batch_size = 200
@@ -225,7 +250,7 @@ class Config:
         logger.info(f"  - Use Compact JSON: {cls.use_compact_json}")
 
     @classmethod
-    def get_models_for_provider(cls, provider: str) -> dict:
+    def get_models_for_provider(cls, provider: str) -> Mapping:
         """Get available models for the selected provider"""
         if provider == "OpenRouter":
             return cls.OPENROUTER_MODELS
@@ -237,11 +262,12 @@ class Config:
         if provider is None:
             provider = cls.provider
 
-        models = cls.get_models_for_provider(provider)
-        if model in models:
-            return models[model]["max_context"]
+        if provider == "OpenRouter":
+            max_contexts = cls._OPENROUTER_MAX_CONTEXT
+        else:
+            max_contexts = cls._OPENAI_MAX_CONTEXT
         # Default fallback
-        return 8192
+        return max_contexts.get(model, 8192)
 
     @classmethod
     def validate_token_limit(cls, input_tokens: int, max_output_tokens: int, model: str = None, provider: str = None) -> tuple:
@@ -20,15 +20,53 @@ Usage:
         log_exception(logger, "Operation failed", e)
 """
 
+import atexit
+import gzip
 import logging
+import os
+import shutil
 import sys
-from datetime import datetime
+import threading
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+from queue import SimpleQueue
+from typing import List, Optional
 from colorama import Fore, Style, init
 
-# Initialize colorama
-init(autoreset=True)
+# colorama.init() wraps sys.stdout, so it only runs once colored output is
+# actually written to a terminal (see _ensure_colorama)
+_colorama_initialized = False
+
+# stdout at import time - console logs keep going to the real output even if
+# handlers are created while the Streamlit app redirects sys.stdout
+_IMPORT_STDOUT = sys.stdout
+# Stream the most recently created console handler writes to
+_console_stream = None
+
+
+def _stdout_is_tty() -> bool:
+    """Check whether stdout is an interactive terminal (False for pipes and captures)"""
+    isatty = getattr(sys.stdout, "isatty", None)
+    try:
+        return bool(isatty and isatty())
+    except ValueError:  # stdout already closed
+        return False
+
+
+def _ensure_colorama() -> bool:
+    """
+    Initialize colorama on first use if stdout is a terminal.
+
+    Returns:
+        bool: True if colored console output should be used
+    """
+    global _colorama_initialized
+    if not _stdout_is_tty():
+        return False
+    if not _colorama_initialized:
+        init(autoreset=True)
+        _colorama_initialized = True
+    return True
 
 
 class ColoredFormatter(logging.Formatter):
@@ -52,21 +90,130 @@ class ColoredFormatter(logging.Formatter):
         logging.CRITICAL: "[!!]",
     }
 
+    def __init__(self, *args, use_color: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.use_color = use_color
+        # Decorated level names and message colors, built once per level
+        self._levelnames = {}
+        self._colors = {}
+        for levelno, symbol in self.SYMBOLS.items():
+            self._levelnames[levelno] = self._decorate_levelname(levelno, logging.getLevelName(levelno))
+            self._colors[levelno] = self.COLORS[levelno] if use_color else ""
+
+    def _decorate_levelname(self, levelno: int, levelname: str) -> str:
+        """Add the level's symbol (and color) to a level name"""
+        symbol = self.SYMBOLS.get(levelno, "•")
+        if not self.use_color:
+            # Plain output for pipes (e.g. Streamlit Cloud): symbols only
+            return f"{symbol} {levelname}"
+        color = self.COLORS.get(levelno, Fore.WHITE)
+        return f"{color}{symbol} {levelname}{Style.RESET_ALL}"
+
     def format(self, record):
         """Format the log record with colors and symbols"""
-        # Get color for this level
-        color = self.COLORS.get(record.levelno, Fore.WHITE)
+        levelname, msg = record.levelname, record.msg
 
-        # Get symbol for this level
-        symbol = self.SYMBOLS.get(record.levelno, "•")
-
-        # Add symbol and color to levelname
-        record.levelname = f"{color}{symbol} {record.levelname}{Style.RESET_ALL}"
+        decorated = self._levelnames.get(record.levelno)
+        if decorated is None:
+            decorated = self._decorate_levelname(record.levelno, levelname)
+        record.levelname = decorated
 
         # Color the message
-        record.msg = f"{color}{record.msg}{Style.RESET_ALL}"
+        if self.use_color:
+            color = self._colors.get(record.levelno, Fore.WHITE)
+            record.msg = f"{color}{msg}{Style.RESET_ALL}"
+
+        try:
+            return super().format(record)
+        finally:
+            # Restore the record - the file handler formats the same record
+            record.levelname, record.msg = levelname, msg
+
+
+def _gzip_namer(name: str) -> str:
+    """Name rotated log files with a .gz extension"""
+    return name + ".gz"
+
+
+def _gzip_rotator(source: str, dest: str):
+    """Compress the closed log file into its rotated name"""
+    if not os.path.exists(source):  # Nothing logged since the last rollover
+        return
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def _create_handlers(
+    level: int = logging.INFO,
+    log_to_file: bool = True,
+    log_dir: str = "logs",
+    console_level: int = None,
+    file_level: int = None,
+    backup_count: int = 5
+) -> List[logging.Handler]:
+    """
+    Create the console and (optionally) rotating file handlers.
+
+    Arguments are the handler options of setup_logger().
+
+    Returns:
+        List of configured handlers
+    """
+    global _console_stream
+
+    # Set levels
+    console_level = console_level or level
+    file_level = file_level or logging.DEBUG
+
+    # ===== Console Handler (with colors) =====
+    use_color = _ensure_colorama()
+    _console_stream = sys.stdout if use_color else _IMPORT_STDOUT
+    console_handler = logging.StreamHandler(_console_stream)
+    console_handler.setLevel(console_level)
+    console_handler.setFormatter(ColoredFormatter(
+        fmt='%(asctime)s | %(levelname)s | %(message)s',
+        datefmt='%H:%M:%S',
+        use_color=use_color
+    ))
+    handlers = [console_handler]
+
+    # ===== File Handler (detailed, with rotation) =====
+    if log_to_file:
+        log_path = Path(log_dir)
+        log_path.mkdir(exist_ok=True)
+
+        # Rolled over at midnight; previous days are kept gzipped as
+        # mapping_service.log.YYYY-MM-DD.gz
+        log_file = log_path / "mapping_service.log"
+
+        file_handler = TimedRotatingFileHandler(
+            log_file,
+            when='midnight',
+            backupCount=backup_count,
+            encoding='utf-8',
+            delay=True
+        )
+        file_handler.namer = _gzip_namer
+        file_handler.rotator = _gzip_rotator
+        file_handler.setLevel(file_level)
+        file_handler.setFormatter(logging.Formatter(
+            fmt='%(asctime)s | %(name)s | %(levelname)-8s | %(funcName)s:%(lineno)d | %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        ))
 
-        return super().format(record)
+        # File writes happen on a background listener thread so logging
+        # callers (batch workers, the UI thread) never wait on disk I/O
+        log_queue = SimpleQueue()
+        listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.setLevel(file_level)
+        handlers.append(queue_handler)
+
+    return handlers
 
 
 def setup_logger(
@@ -76,7 +223,6 @@ def setup_logger(
     log_dir: str = "logs",
     console_level: int = None,
     file_level: int = None,
-    max_bytes: int = 100 * 1024 * 1024,  # 100 MB (increased to prevent rotation during batch processing)
     backup_count: int = 5
 ) -> logging.Logger:
     """
@@ -89,8 +235,7 @@ def setup_logger(
         log_dir: Directory for log files
         console_level: Specific level for console (default: level)
         file_level: Specific level for file (default: DEBUG)
-        max_bytes: Maximum size of each log file
-        backup_count: Number of backup files to keep
+        backup_count: Number of daily backup files to keep
 
     Returns:
         Configured logger instance
@@ -108,42 +253,41 @@ def setup_logger(
     if logger.handlers:
         return logger
 
-    # Set levels
-    console_level = console_level or level
-    file_level = file_level or logging.DEBUG
+    for handler in _create_handlers(level, log_to_file, log_dir, console_level,
+                                    file_level, backup_count):
+        logger.addHandler(handler)
 
-    # ===== Console Handler (with colors) =====
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(console_level)
-    console_handler.setFormatter(ColoredFormatter(
-        fmt='%(asctime)s | %(levelname)s | %(message)s',
-        datefmt='%H:%M:%S'
-    ))
-    logger.addHandler(console_handler)
+    return logger
 
-    # ===== File Handler (detailed, with rotation) =====
-    if log_to_file:
-        log_path = Path(log_dir)
-        log_path.mkdir(exist_ok=True)
 
-        # Create filename with date
-        timestamp = datetime.now().strftime('%Y%m%d')
-        log_file = log_path / f"mapping_service_{timestamp}.log"
+# Default console/file handlers shared by every logger from get_logger(),
+# created when the first record is emitted
+_default_handlers: Optional[List[logging.Handler]] = None
+_default_handlers_lock = threading.Lock()
 
-        file_handler = RotatingFileHandler(
-            log_file,
-            maxBytes=max_bytes,
-            backupCount=backup_count,
-            encoding='utf-8'
-        )
-        file_handler.setLevel(file_level)
-        file_handler.setFormatter(logging.Formatter(
-            fmt='%(asctime)s | %(name)s | %(levelname)-8s | %(funcName)s:%(lineno)d | %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        ))
-        logger.addHandler(file_handler)
 
-    return logger
+def _get_default_handlers() -> List[logging.Handler]:
+    """Return the shared default handlers, creating them on first use"""
+    global _default_handlers
+    if _default_handlers is None:
+        with _default_handlers_lock:
+            if _default_handlers is None:
+                _default_handlers = _create_handlers()
+    return _default_handlers
+
+
+class _DeferredHandler(logging.Handler):
+    """
+    Handler installed by get_logger() that forwards to the shared default handlers.
+
+    Importing a module therefore does not create the log directory or open the
+    log file; that happens when the first record is actually logged.
+    """
+
+    def emit(self, record):
+        for handler in _get_default_handlers():
+            if record.levelno >= handler.level:
+                handler.handle(record)
 
 
 def get_logger(name: str = None) -> logging.Logger:
@@ -166,15 +310,16 @@ def get_logger(name: str = None) -> logging.Logger:
 
     logger = logging.getLogger(name)
 
-    # If logger has no handlers, set it up
+    # If logger has no handlers, attach the shared (deferred) default handlers
     if not logger.handlers:
-        return setup_logger(name)
+        logger.setLevel(logging.DEBUG)  # Capture everything, handlers will filter
+        logger.addHandler(_DeferredHandler())
 
     return logger
 
 
 # Create default logger instance for simple imports
-logger = setup_logger()
+logger = get_logger()
 
 
 def log_exception(logger_instance, message: str, exc: Exception = None):
@@ -192,12 +337,18 @@ def log_exception(logger_instance, message: str, exc: Exception = None):
         >>> except Exception as e:
         >>>     log_exception(logger, "Operation failed", e)
     """
+    if not logger_instance.isEnabledFor(logging.ERROR):
+        return
     if exc:
         logger_instance.exception(f"{message}: {type(exc).__name__}: {exc}")
     else:
         logger_instance.exception(message)
 
 
+_API_CALL_TEMPLATE = ("API Call [%s] | Provider: %s | Model: %s | "
+                      "Tokens: %s (in: %s, out: %s) | Latency: %.2fs")
+
+
 def log_api_call(logger_instance, provider: str, model: str, tokens: dict, latency: float, success: bool = True):
     """
     Log an API call with structured information.
@@ -220,16 +371,29 @@ def log_api_call(logger_instance, provider: str, model: str, tokens: dict, laten
         >>>     success=True
         >>> )
     """
-    status = "SUCCESS" if success else "FAILED"
-    msg = (f"API Call [{status}] | Provider: {provider} | Model: {model} | "
-           f"Tokens: {tokens.get('total', 0):,} (in: {tokens.get('input', 0):,}, out: {tokens.get('output', 0):,}) | "
-           f"Latency: {latency:.2f}s")
-    logger_instance.info(msg)
-
-    # Also print to stdout for Streamlit console capture (in async threads, logger might not reach Streamlit)
+    # Console logs go to the terminal, not to a redirected stdout - the line is
+    # also printed while stdout is redirected (Streamlit console capture)
+    log_enabled = logger_instance.isEnabledFor(logging.INFO)
+    if not log_enabled and sys.stdout is _console_stream:
+        return
+
+    msg = _API_CALL_TEMPLATE % (
+        "SUCCESS" if success else "FAILED", provider, model,
+        format(tokens.get('total', 0), ","), format(tokens.get('input', 0), ","),
+        format(tokens.get('output', 0), ","), latency
+    )
+    if log_enabled:
+        logger_instance.info(msg)
+
+    # Printing while stdout is the terminal would show every API call twice
+    if sys.stdout is _console_stream:
+        return
     try:
         import builtins
-        color = Fore.GREEN if success else Fore.RED
-        builtins.print(f"{color}[+] {msg}{Style.RESET_ALL}")
+        if _stdout_is_tty():
+            color = Fore.GREEN if success else Fore.RED
+            builtins.print(f"{color}[+] {msg}{Style.RESET_ALL}")
+        else:
+            builtins.print(f"[+] {msg}")
     except:
         pass  # Ignore print failures in async context
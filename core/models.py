@@ -14,6 +14,8 @@ from dataclasses import dataclass, field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
+from core.config import Config
+
 
 @dataclass
 class MappingItem:
@@ -28,6 +30,9 @@ class MappingItem:
         similarity_score: Similarity score (0-100)
         reasoning: Explanation for the similarity score
     """
+    __slots__ = ("first_code", "first_name", "second_code", "second_name",
+                 "similarity_score", "reasoning")
+
     first_code: str
     first_name: str
     second_code: Optional[str]
@@ -62,8 +67,7 @@ class MappingItem:
 
     @property
     def is_above_threshold(self) -> bool:
-        """Check if similarity score is above threshold (imported at runtime)"""
-        from core.config import Config
+        """Check if similarity score is above threshold"""
         return self.similarity_score >= Config.threshold
 
     def to_dict(self) -> Dict[str, Any]:
@@ -117,6 +121,8 @@ class BatchConfig:
         total_batches: Total number of batches
         batches: List of batch dictionaries with ranges
     """
+    __slots__ = ("first_size", "second_size", "total_batches", "batches")
+
     first_size: int
     second_size: int
     total_batches: int
@@ -152,6 +158,8 @@ class TokenUsage:
         output_tokens: Tokens in the output (response)
         total_tokens: Total tokens used
     """
+    __slots__ = ("input_tokens", "output_tokens", "total_tokens")
+
     input_tokens: int
     output_tokens: int
     total_tokens: int
@@ -218,7 +226,26 @@ class ProcessingResult:
     @property
     def above_threshold_count(self) -> int:
         """Count of items above threshold"""
-        return sum(1 for m in self.mappings if m.is_above_threshold)
+        threshold = Config.threshold
+        return sum(1 for m in self.mappings if m.similarity_score >= threshold)
+
+    def _compute_statistics(self) -> Dict[str, Any]:
+        """Compute mapped/unmapped counts, average and above-threshold count in one pass"""
+        threshold = Config.threshold
+        mapped_count = above_threshold = 0
+        mapped_score_sum = 0.0
+        for m in self.mappings:
+            if m.similarity_score >= threshold:
+                above_threshold += 1
+            if m.is_mapped:
+                mapped_count += 1
+                mapped_score_sum += m.similarity_score
+        return {
+            "mapped_count": mapped_count,
+            "unmapped_count": len(self.mappings) - mapped_count,
+            "average_score": mapped_score_sum / mapped_count if mapped_count else 0.0,
+            "above_threshold": above_threshold
+        }
 
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -237,12 +264,7 @@ class ProcessingResult:
             "elapsed_time": self.elapsed_time,
             "parameters_used": self.parameters_used,
             "timestamp": self.timestamp.isoformat(),
-            "statistics": self.statistics or {
-                "mapped_count": self.mapped_count,
-                "unmapped_count": self.unmapped_count,
-                "average_score": self.average_score,
-                "above_threshold": self.above_threshold_count
-            }
+            "statistics": self.statistics or self._compute_statistics()
         }
 
 
@@ -265,6 +287,10 @@ class APICallRecord:
         unmapped_count: Number of unmapped items
         avg_score: Average similarity score
     """
+    __slots__ = ("timestamp", "model", "temperature", "top_p", "max_batch_size", "wait_time",
+                 "latency", "token_usage", "total_mappings", "mapped_count",
+                 "unmapped_count", "avg_score")
+
     timestamp: datetime
     model: str
     temperature: float
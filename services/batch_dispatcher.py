@@ -1,45 +1,82 @@
 # batch_dispatcher.py
-import json
-import math
-import time
 import asyncio
-from typing import List, Dict, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Dict, Optional, Tuple
+from functools import lru_cache
+from itertools import islice
+import numpy as np
 from colorama import Fore
-import re
 
 from core.config import Config
-from api.client import PerformMapping
+from api.client import PerformMapping, PerformMappingAsync, join_group_rows, safe_print, serialize_group_rows
 from services.result_processor import ProcessMappingResults
-from api.rate_limiter import get_rate_limiter_for_model, estimate_tokens
+from api.rate_limiter import get_rate_limiter_for_model, estimate_tokens, preload_tokenizer
 from core.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Rolling (EWMA) estimate of the seconds one batch's API call takes. It is
+# kept across Dispatcher runs so the next run's ETA starts from observed
+# times; per-run averages are tracked separately (see process_batches_async)
+_BATCH_SECONDS_ALPHA = 0.3
+_DEFAULT_BATCH_SECONDS = 10.0
+_batch_seconds_ewma: Optional[float] = None
+
+
+def _record_batch_time(elapsed_time: float):
+    """Fold one batch's API call time into the rolling per-batch estimate"""
+    global _batch_seconds_ewma
+    if _batch_seconds_ewma is None:
+        _batch_seconds_ewma = elapsed_time
+    else:
+        _batch_seconds_ewma += _BATCH_SECONDS_ALPHA * (elapsed_time - _batch_seconds_ewma)
+
+
+def _estimate_minutes(remaining_batches: int, concurrency: int) -> float:
+    """Estimate the minutes needed for the remaining batches at the given concurrency"""
+    seconds_per_batch = _batch_seconds_ewma if _batch_seconds_ewma is not None else _DEFAULT_BATCH_SECONDS
+    return remaining_batches * seconds_per_batch / max(concurrency, 1) / 60
 
-def safe_print(*args, **kwargs):
-    """
-    Safe print function that catches NoSessionContext errors.
 
-    When running in async ThreadPoolExecutor, Streamlit's print() redirection
-    fails with NoSessionContext. This wrapper catches that error and falls back
-    to logging.
+# Batch plan fields reported in the result's batch_metadata
+_PLAN_SUMMARY_KEYS = ("n1", "n2", "f", "s", "b1", "b2", "total_batches")
+
+
+@lru_cache(maxsize=128)
+def _split_core(n1: int, n2: int, max_batch_size: int) -> Tuple:
     """
-    try:
-        # Use builtins.print to avoid recursion
-        import builtins
-        builtins.print(*args, **kwargs)
-    except Exception as e:
-        # If print fails (e.g., NoSessionContext in async threads), use logger
-        if 'NoSessionContext' in str(type(e).__name__):
-            # Extract message from args
-            message = ' '.join(str(arg) for arg in args)
-            # Clean ANSI color codes for logger
-            clean_message = re.sub(r'\x1b\[[0-9;]+m', '', message)
-            logger.debug(f"[print suppressed in async context] {clean_message}")
-        else:
-            # Re-raise if it's a different error
-            raise
+    Compute the optimal split and its block boundaries.
+    
+    Cached so Streamlit reruns on the same dataset skip the search entirely.
+    The boundary arrays are shared between calls and therefore read-only.
+    
+    Returns:
+        tuple: (f, s, total_batches, first_starts, first_ends, second_starts,
+        second_ends) where each block is the 0-indexed slice [start, end)
+    """
+    # Score every split where f + s = max_batch_size in one vectorized pass.
+    # ceil() makes the batch count a step function, so the continuous
+    # optimum is not reliable and every split has to be scored.
+    f = np.arange(1, max_batch_size, dtype=np.int64)
+    s = max_batch_size - f
+    total = (-(-n1 // f)) * (-(-n2 // s))  # ceil division
+    diff = np.abs(f - s)
+    remainder = (n1 % f) + (n2 % s)
+    
+    # lexsort uses the last key as primary: fewest total batches, then the
+    # most balanced split, then smaller remainders, then larger s
+    idx = np.lexsort((-s, remainder, diff, total))[0]
+    best_f, best_s = int(f[idx]), int(s[idx])
+    
+    # Block boundaries as int32 arrays (structure of arrays)
+    first_starts = np.arange(0, n1, best_f, dtype=np.int32)
+    first_ends = np.minimum(first_starts + best_f, n1).astype(np.int32)
+    second_starts = np.arange(0, n2, best_s, dtype=np.int32)
+    second_ends = np.minimum(second_starts + best_s, n2).astype(np.int32)
+    for array in (first_starts, first_ends, second_starts, second_ends):
+        array.flags.writeable = False
+    
+    return (best_f, best_s, int(total[idx]),
+            first_starts, first_ends, second_starts, second_ends)
 
 
 def calculate_optimal_batch_split(n1: int, n2: int, max_batch_size: int = 200) -> Dict:
@@ -54,98 +91,82 @@ def calculate_optimal_batch_split(n1: int, n2: int, max_batch_size: int = 200) -
     Returns:
         Dictionary with optimal batching plan
     """
+    (best_f, best_s, min_batches,
+     first_starts, first_ends, second_starts, second_ends) = _split_core(n1, n2, max_batch_size)
+    
+    return {
+        "n1": n1,
+        "n2": n2,
+        "f": best_f,
+        "s": best_s,
+        "b1": len(first_starts),
+        "b2": len(second_starts),
+        "total_batches": min_batches,
+        # Block boundaries: block i covers rows [starts[i], ends[i]) (0-indexed)
+        "first_starts": first_starts,
+        "first_ends": first_ends,
+        "second_starts": second_starts,
+        "second_ends": second_ends
+    }
+
+
+def get_block(batch_plan: Dict, group: str, index: int) -> Dict:
+    """
+    Return one block of a plan in the 1-indexed {"index", "start", "end"} form.
     
-    best_f, best_s = 0, 0
-    min_batches = float('inf')
+    Args:
+        batch_plan: Batch planning dictionary from calculate_optimal_batch_split
+        group: "first" or "second"
+        index: 1-indexed block number
     
-    # Try all possible splits where f + s = max_batch_size
-    for f in range(1, max_batch_size):
-        s = max_batch_size - f
-        if s < 1:
-            continue
-            
-        b1 = math.ceil(n1 / f)
-        b2 = math.ceil(n2 / s)
-        total_batches = b1 * b2
-        
-        if total_batches < min_batches:
-            min_batches = total_batches
-            best_f = f
-            best_s = s
-        elif total_batches == min_batches:
-            # Tie-breaking rules
-            current_diff = abs(best_f - best_s)
-            new_diff = abs(f - s)
-            
-            if new_diff < current_diff:
-                # Prefer more balanced split
-                best_f = f
-                best_s = s
-            elif new_diff == current_diff:
-                # Prefer smaller remainders
-                current_remainder = (n1 % best_f) + (n2 % best_s)
-                new_remainder = (n1 % f) + (n2 % s)
-                
-                if new_remainder < current_remainder:
-                    best_f = f
-                    best_s = s
-                elif new_remainder == current_remainder and s > best_s:
-                    # Prefer larger s
-                    best_f = f
-                    best_s = s
+    Returns:
+        Block dictionary covering rows start..end (inclusive, 1-indexed)
+    """
+    starts = batch_plan[f"{group}_starts"]
+    ends = batch_plan[f"{group}_ends"]
+    if not 1 <= index <= len(starts):
+        raise IndexError(f"{group} block index {index} out of range (1-{len(starts)})")
+    return {
+        "index": index,
+        "start": int(starts[index - 1]) + 1,
+        "end": int(ends[index - 1])
+    }
+
+
+def iter_batches(batch_plan: Dict) -> Iterator[Dict]:
+    """
+    Lazily generate the batches of a plan, first group blocks outermost.
     
-    # Calculate blocks
-    b1 = math.ceil(n1 / best_f)
-    b2 = math.ceil(n2 / best_s)
+    Batches are produced on demand, so dispatch memory does not grow with
+    b1 * b2.
     
-    # Create block ranges
-    first_blocks = []
-    for i in range(b1):
-        start = i * best_f
-        end = min((i + 1) * best_f, n1)
-        first_blocks.append({
-            "index": i + 1,
-            "start": start + 1,  # 1-indexed
-            "end": end
-        })
+    Args:
+        batch_plan: Batch planning dictionary from calculate_optimal_batch_split
     
-    second_blocks = []
-    for j in range(b2):
-        start = j * best_s
-        end = min((j + 1) * best_s, n2)
-        second_blocks.append({
-            "index": j + 1,
-            "start": start + 1,  # 1-indexed
-            "end": end
-        })
+    Yields:
+        Batch dictionary with its 1-indexed row ranges in each group
+    """
+    # Convert to plain 1-indexed ints once per block, not once per batch
+    first_ranges = [
+        [int(start) + 1, int(end)]
+        for start, end in zip(batch_plan["first_starts"], batch_plan["first_ends"])
+    ]
+    second_ranges = [
+        [int(start) + 1, int(end)]
+        for start, end in zip(batch_plan["second_starts"], batch_plan["second_ends"])
+    ]
     
-    # Create batch plan
-    batches = []
     batch_index = 1
-    for i in range(b1):
-        for j in range(b2):
-            batch = {
+    for i, first_range in enumerate(first_ranges, 1):
+        for j, second_range in enumerate(second_ranges, 1):
+            yield {
                 "batch_index": batch_index,
-                "first_block_index": i + 1,
-                "second_block_index": j + 1,
-                "first_range": [first_blocks[i]["start"], first_blocks[i]["end"]],
-                "second_range": [second_blocks[j]["start"], second_blocks[j]["end"]]
+                "first_block_index": i,
+                "second_block_index": j,
+                "first_range": list(first_range),
+                "second_range": list(second_range)
             }
-            batches.append(batch)
             batch_index += 1
-    
-    return {
-        "n1": n1,
-        "n2": n2,
-        "f": best_f,
-        "s": best_s,
-        "b1": b1,
-        "b2": b2,
-        "total_batches": min_batches,
-        "first_blocks": first_blocks,
-        "second_blocks": second_blocks,
-        "batches": batches
-    }
 
 
 async def process_batch_async(
@@ -158,7 +179,9 @@ async def process_batch_async(
     second_group_compact: List[Dict],
     prompt: str,
     rate_limiter,
-    executor: ThreadPoolExecutor
+    first_fragments: List[bytes],
+    second_fragments: List[bytes],
+    api_call_seconds: Optional[List[float]] = None
 ) -> Optional[Dict]:
     """
     Process a single batch asynchronously with rate limiting.
@@ -173,7 +196,11 @@ async def process_batch_async(
         second_group_compact: Compact format second group data
         prompt: Prompt text
         rate_limiter: RateLimiter instance for RPM/TPM tracking
-        executor: ThreadPoolExecutor for running sync code
+        first_fragments: Per-row JSON of the first group as sent to the API
+            (from serialize_group_rows)
+        second_fragments: Per-row JSON of the second group as sent to the API
+        api_call_seconds: Optional list that this batch's API call time is
+            appended to (not for cached results)
 
     Returns:
         Batch result dictionary or None if failed
@@ -186,79 +213,68 @@ async def process_batch_async(
     second_start = batch_info['second_range'][0] - 1
     second_end = batch_info['second_range'][1]
 
-    # Get batch subsets
+    # Get batch subsets (compact subsets are only sent in compact mode)
+    use_compact = Config.use_compact_json
     batch_first_list = first_group_list[first_start:first_end]
     batch_second_list = second_group_list[second_start:second_end]
-    batch_first_compact = first_group_compact[first_start:first_end]
-    batch_second_compact = second_group_compact[second_start:second_end]
+    if use_compact:
+        batch_first_compact = first_group_compact[first_start:first_end]
+        batch_second_compact = second_group_compact[second_start:second_end]
 
     logger.info(f"  - First group: rows {batch_info['first_range'][0]}-{batch_info['first_range'][1]} ({len(batch_first_list)} items)")
     logger.info(f"  - Second group: rows {batch_info['second_range'][0]}-{batch_info['second_range'][1]} ({len(batch_second_list)} items)")
 
-    # Estimate tokens for this batch
-    estimated_tokens = 0
-    if Config.use_compact_json:
-        batch_text = json.dumps(batch_first_compact + batch_second_compact)
-    else:
-        batch_text = json.dumps(batch_first_list + batch_second_list)
-    estimated_tokens = estimate_tokens(batch_text + prompt)
-
-    # Check rate limits and wait if necessary
-    wait_time = rate_limiter.wait_if_needed(estimated_tokens)
-    if wait_time > 0:
-        logger.info(f"  - Waited {wait_time:.1f}s for rate limits")
-
-    # Check if we can proceed
-    can_proceed, reason = rate_limiter.can_make_request(estimated_tokens)
-    if not can_proceed:
+    # Assemble the batch JSON from the pre-serialized rows; the same bytes are
+    # used for the token estimate and the prompt
+    first_json = join_group_rows(first_fragments[first_start:first_end])
+    second_json = join_group_rows(second_fragments[second_start:second_end])
+
+    # Token counting is CPU work - run it in a worker thread, not on the event loop
+    estimated_tokens = await asyncio.to_thread(
+        estimate_tokens, (first_json + second_json).decode("utf-8") + prompt, Config.model
+    )
+
+    # Wait for rate-limit headroom without blocking the event loop, so the
+    # other in-flight batches keep running while this one is throttled
+    while True:
+        wait_time = await rate_limiter.wait_if_needed_async(estimated_tokens)
+        if wait_time > 0:
+            logger.info(f"  - Waited {wait_time:.1f}s for rate limits")
+
+        can_proceed, reason = rate_limiter.can_make_request(estimated_tokens)
+        if can_proceed:
+            break
         logger.warning(f"[!] Batch {batch_index} delayed due to rate limits: {reason}")
         logger.info(f"  Waiting 5 seconds before retry...")
         await asyncio.sleep(5)  # Brief wait before retry
-        # Recursive retry after delay
-        return await process_batch_async(
-            batch_info, batch_index, total_batches,
-            first_group_list, second_group_list,
-            first_group_compact, second_group_compact,
-            prompt, rate_limiter, executor
-        )
-
-    # Run the synchronous PerformMapping in the thread pool
-    loop = asyncio.get_event_loop()
 
+    # Await the request on the event loop; the limiter also adopts the limits
+    # reported in the response headers
     try:
-        if Config.use_compact_json:
-            api_result = await loop.run_in_executor(
-                executor,
-                lambda: PerformMapping(
-                    first_group=batch_first_compact,
-                    second_group=batch_second_compact,
-                    prompt=prompt,
-                    verbose=False,
-                    use_compact=True,
-                    full_format_first=batch_first_list,
-                    full_format_second=batch_second_list
-                )
-            )
-        else:
-            api_result = await loop.run_in_executor(
-                executor,
-                lambda: PerformMapping(
-                    first_group=batch_first_list,
-                    second_group=batch_second_list,
-                    prompt=prompt,
-                    verbose=False,
-                    use_compact=False
-                )
-            )
+        api_result = await PerformMappingAsync(
+            first_group=batch_first_compact if use_compact else batch_first_list,
+            second_group=batch_second_compact if use_compact else batch_second_list,
+            prompt=prompt,
+            verbose=False,
+            use_compact=use_compact,
+            rate_limiter=rate_limiter,
+            first_group_json=first_json,
+            second_group_json=second_json
+        )
 
         if api_result is None:
-            logger.error(f"[X] Batch {batch_index} failed - PerformMapping returned None")
+            logger.error(f"[X] Batch {batch_index} failed - PerformMappingAsync returned None")
             logger.error(f"  Possible causes: Missing API key, invalid credentials, or API error")
             return None
 
-        # Record the API call in rate limiter
-        total_tokens = api_result["response"].usage.total_tokens
-        rate_limiter.record_request(total_tokens)
+        # Record the API call in rate limiter and the ETA estimate (cached
+        # results made no API call)
+        if api_result["response"] is not None:
+            total_tokens = api_result["response"].usage.total_tokens
+            rate_limiter.record_request(total_tokens)
+            _record_batch_time(api_result["elapsed_time"])
+            if api_call_seconds is not None:
+                api_call_seconds.append(api_result["elapsed_time"])
 
         # Get current rate limiter stats
         stats = rate_limiter.get_stats()
@@ -278,8 +294,8 @@ async def process_batch_async(
             logger.info(f"[+] Batch {batch_index} of {total_batches} completed successfully")
             logger.info(f"  - Mappings in this batch: {len(api_result['mappings'])}")
             # Also print to stdout for Streamlit console capture
-            safe_print(f"{Fore.GREEN}[+] Batch {batch_index} of {total_batches} completed successfully")
-            safe_print(f"{Fore.WHITE}  - Mappings in this batch: {len(api_result['mappings'])}")
+            safe_print(f"{Fore.GREEN}[+] Batch {batch_index} of {total_batches} completed successfully\n"
+                       f"{Fore.WHITE}  - Mappings in this batch: {len(api_result['mappings'])}")
             return batch_result
 
         return None
@@ -300,7 +316,7 @@ async def process_batches_async(
     second_group_compact: List[Dict],
     prompt: str,
     max_concurrent_batches: int = 3
-) -> List[Dict]:
+) -> Tuple[Optional[Dict], int, int, Optional[float]]:
     """
     Process multiple batches asynchronously with rate limiting.
 
@@ -314,47 +330,66 @@ async def process_batches_async(
         max_concurrent_batches: Maximum number of concurrent batch operations (default: 3)
 
     Returns:
-        List of batch results
+        Tuple of (last completed batch result, number of successful batches,
+        total mappings received across batches, average API call seconds per
+        batch in this run or None if no API call was made)
     """
     # Initialize rate limiter for the current model
     rate_limiter = get_rate_limiter_for_model(Config.model, Config.provider)
 
-    # Create thread pool for running sync code
-    executor = ThreadPoolExecutor(max_workers=max_concurrent_batches)
-
-    # Create semaphore to limit concurrent batches
-    semaphore = asyncio.Semaphore(max_concurrent_batches)
-
-    async def process_with_semaphore(batch_info, batch_index):
-        async with semaphore:
-            return await process_batch_async(
-                batch_info, batch_index, batch_plan['total_batches'],
-                first_group_list, second_group_list,
-                first_group_compact, second_group_compact,
-                prompt, rate_limiter, executor
-            )
-
-    # Create tasks for all batches
-    tasks = [
-        process_with_semaphore(batch, i + 1)
-        for i, batch in enumerate(batch_plan['batches'])
-    ]
+    # Serialize every row once; each batch joins its slice of fragments
+    # instead of serializing rows again for every batch they appear in
+    if Config.use_compact_json:
+        first_fragments = serialize_group_rows(first_group_compact)
+        second_fragments = serialize_group_rows(second_group_compact)
+    else:
+        first_fragments = serialize_group_rows(first_group_list)
+        second_fragments = serialize_group_rows(second_group_list)
+
+    # A fixed pool of workers pulls batches from one shared generator, so only
+    # the in-flight batches are ever materialized
+    pending_batches = iter_batches(batch_plan)
+    last_result = None
+    batches_done = 0
+    batches_processed = 0
+    total_mappings = 0
+    api_call_seconds: List[float] = []
+
+    async def worker():
+        nonlocal last_result, batches_done, batches_processed, total_mappings
+        for batch_info in pending_batches:
+            batch_index = batch_info['batch_index']
+            try:
+                batch_result = await process_batch_async(
+                    batch_info, batch_index, batch_plan['total_batches'],
+                    first_group_list, second_group_list,
+                    first_group_compact, second_group_compact,
+                    prompt, rate_limiter,
+                    first_fragments, second_fragments, api_call_seconds
+                )
+            except Exception as e:
+                logger.error(f"[X] Batch {batch_index} raised exception: {str(e)}")
+                batch_result = None
+
+            batches_done += 1
+            remaining = batch_plan['total_batches'] - batches_done
+            if remaining:
+                logger.info(f"  - ETA: ~{_estimate_minutes(remaining, max_concurrent_batches):.1f} minutes "
+                            f"for {remaining} remaining batches")
+
+            if batch_result is not None:
+                # Results accumulate in completion order, so the batch that
+                # finishes last carries every mapping processed so far
+                last_result = batch_result
+                batches_processed += 1
+                total_mappings += batch_result["statistics"]["total_mappings"]
 
     # Process all batches concurrently
     logger.info(f"Starting async batch processing with max {max_concurrent_batches} concurrent batches...")
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.gather(*(worker() for _ in range(max_concurrent_batches)))
 
-    # Filter out None results and exceptions
-    successful_results = []
-    for i, result in enumerate(results):
-        if isinstance(result, Exception):
-            logger.error(f"[X] Batch {i+1} raised exception: {str(result)}")
-        elif result is not None:
-            successful_results.append(result)
-
-    executor.shutdown(wait=True)
-
-    return successful_results
+    avg_batch_seconds = sum(api_call_seconds) / len(api_call_seconds) if api_call_seconds else None
+    return last_result, batches_processed, total_mappings, avg_batch_seconds
 
 
 def Dispatcher(first_group_list: List[Dict],
@@ -402,10 +437,12 @@ def Dispatcher(first_group_list: List[Dict],
         logger.error(f"[X] CRITICAL: {test_provider} API key not found!")
         logger.error(f"  Cannot proceed with batch processing without valid API credentials")
         logger.error(f"  Please set {test_provider} API key in environment or Streamlit secrets")
-        safe_print(f"\n{Fore.RED}[X] ERROR: Missing API key for {test_provider}")
-        safe_print(f"{Fore.YELLOW}Please set your API key before processing:")
-        safe_print(f"  - Environment variable: {'OPENAI_API_KEY' if test_provider == 'OpenAI' else 'OPENROUTER_API_KEY'}")
-        safe_print(f"  - Or Streamlit secrets: .streamlit/secrets.toml")
+        safe_print("\n".join([
+            f"\n{Fore.RED}[X] ERROR: Missing API key for {test_provider}",
+            f"{Fore.YELLOW}Please set your API key before processing:",
+            f"  - Environment variable: {'OPENAI_API_KEY' if test_provider == 'OpenAI' else 'OPENROUTER_API_KEY'}",
+            f"  - Or Streamlit secrets: .streamlit/secrets.toml"
+        ]))
         return None
     logger.info(f"[+] API key validated for {test_provider}")
 
@@ -465,28 +502,34 @@ def Dispatcher(first_group_list: List[Dict],
     logger.info(f"  - Number of second group blocks (b2): {batch_plan['b2']}")
     logger.info(f"  - Total batches: {batch_plan['total_batches']}")
     logger.info(f"  - Wait between batches: {wait_between_batches} seconds")
-    logger.info(f"  - Estimated total time: ~{batch_plan['total_batches'] * (wait_between_batches + 10) / 60:.1f} minutes")
+
+    # Determine max concurrent batches from Config
+    max_concurrent = min(Config.max_concurrent_batches, batch_plan['total_batches'])
+    logger.info(f"  - Estimated total time: ~{_estimate_minutes(batch_plan['total_batches'], max_concurrent):.1f} minutes")
     
     if verbose:
-        safe_print(f"\n{Fore.CYAN}Batch Details (first 5):")
-        for batch in batch_plan['batches'][:5]:
-            safe_print(f"{Fore.WHITE}  Batch {batch['batch_index']}: "
-                  f"First[{batch['first_range'][0]}-{batch['first_range'][1]}] × "
-                  f"Second[{batch['second_range'][0]}-{batch['second_range'][1]}]")
-        if len(batch_plan['batches']) > 5:
-            logger.info(f"  ... and {len(batch_plan['batches']) - 5} more batches")
+        # Emit the listing as one write
+        lines = [f"\n{Fore.CYAN}Batch Details (first 5):"]
+        for batch in islice(iter_batches(batch_plan), 5):
+            lines.append(f"{Fore.WHITE}  Batch {batch['batch_index']}: "
+                         f"First[{batch['first_range'][0]}-{batch['first_range'][1]}] × "
+                         f"Second[{batch['second_range'][0]}-{batch['second_range'][1]}]")
+        safe_print("\n".join(lines))
+        if batch_plan['total_batches'] > 5:
+            logger.info(f"  ... and {batch_plan['total_batches'] - 5} more batches")
     
     # Process batches asynchronously with rate limiting
     safe_print(f"\n{Fore.YELLOW}Starting async batch processing with rate limiting...")
-
-    # Determine max concurrent batches from Config
-    max_concurrent = min(Config.max_concurrent_batches, batch_plan['total_batches'])
     logger.info(f"  - Max concurrent batches: {max_concurrent}")
     logger.info(f"  - Rate limiting: Automatic RPM/TPM tracking")
 
+    # Load the tokenizer (which may download its BPE file) before the event
+    # loop starts, so the first estimate does not hold up the batches
+    preload_tokenizer(Config.model)
+
     # Run async batch processing
     try:
-        all_results = asyncio.run(
+        final_result, batches_processed, total_mappings, avg_batch_seconds = asyncio.run(
             process_batches_async(
                 batch_plan=batch_plan,
                 first_group_list=first_group_list,
@@ -508,25 +551,24 @@ def Dispatcher(first_group_list: List[Dict],
     logger.info(f"Combining results from all batches...")
     logger.info(f"{'='*60}")
     
-    if not all_results:
+    if not final_result:
         logger.error(f"[X] No successful batches")
         return None
     
-    # Return the last batch result (which contains accumulated DataFrames)
-    final_result = all_results[-1] if all_results else None
-    
+    # The last completed batch result contains the accumulated DataFrames
     if final_result:
         # Update summary statistics
-        total_mappings = sum(len(r.get("mappings", [])) for r in all_results)
         safe_print(f"\n{Fore.GREEN}[+] Batch processing completed")
-        logger.info(f"  - Total batches processed: {len(all_results)}/{batch_plan['total_batches']}")
+        logger.info(f"  - Total batches processed: {batches_processed}/{batch_plan['total_batches']}")
         logger.info(f"  - Total mappings: {total_mappings}")
         
         # Add batch processing metadata
         final_result["batch_metadata"] = {
             "total_batches": batch_plan['total_batches'],
-            "batches_processed": len(all_results),
-            "batch_plan": batch_plan,
+            "batches_processed": batches_processed,
+            "avg_batch_seconds": avg_batch_seconds,
+            # Scalars only - the boundary arrays are not JSON-serializable
+            "batch_plan": {key: batch_plan[key] for key in _PLAN_SUMMARY_KEYS},
             "parameters_used": {
                 "model": Config.model,
                 "temperature": Config.temperature,
@@ -6,9 +6,32 @@ from pathlib import Path
 from colorama import Fore
 
 from core.config import Config
-from services.optimization_utils import create_compact_item
+from services.optimization_utils import compact_item_keys
 from services.batch_dispatcher import Dispatcher
 
+try:
+    import orjson
+except ImportError:  # orjson is optional - fall back to the stdlib encoder
+    orjson = None
+
+
+def _read_code_name_rows(df: pd.DataFrame) -> List[List[str]]:
+    """
+    Extract (code, name) string pairs from the first two columns of a group sheet.
+
+    Rows where both cells are empty are skipped; a single empty cell becomes "".
+
+    Args:
+        df: Sheet read with header=None
+
+    Returns:
+        List of [code, name] pairs
+    """
+    pairs = df.iloc[:, :2]
+    present = pairs.notna()
+    pairs = pairs[present.any(axis=1)].astype(object)
+    return pairs.where(present, "").astype(str).to_numpy().tolist()
+
 
 def SendInputParts(excel_path: str = None, 
                    prompt_path: str = None, 
@@ -114,28 +137,13 @@ def SendInputParts(excel_path: str = None,
         print(f"{Fore.GREEN}[+] First Group sheet loaded")
         print(f"{Fore.WHITE}Shape: {df_first.shape[0]} rows × {df_first.shape[1]} columns")
         
-        # Process First Group data
-        for index, row in df_first.iterrows():
-            # Skip empty rows
-            if pd.isna(row[0]) and pd.isna(row[1]):
-                continue
-                
-            first_code = str(row[0]) if not pd.isna(row[0]) else ""
-            first_name = str(row[1]) if not pd.isna(row[1]) else ""
-            
-            # Full format for display
-            item = {
-                "First Group Code": first_code,
-                "First Group Name": first_name
-            }
-            first_group_list.append(item)
-            
-            # Compact format for API
-            compact_item = create_compact_item(first_code, first_name)
-            first_group_compact.append(compact_item)
-            
-            # Increment counter
-            first_group_count += 1
+        # Process First Group data: full format for display, compact format for API
+        first_rows = _read_code_name_rows(df_first)
+        code_key, name_key = compact_item_keys()
+        first_group_list = [{"First Group Code": code, "First Group Name": name}
+                            for code, name in first_rows]
+        first_group_compact = [{code_key: code, name_key: name} for code, name in first_rows]
+        first_group_count = len(first_rows)
         
         print(f"{Fore.GREEN}[+] Processed {first_group_count} items from First Group")
         
@@ -165,28 +173,13 @@ def SendInputParts(excel_path: str = None,
         print(f"{Fore.GREEN}[+] Second Group sheet loaded")
         print(f"{Fore.WHITE}Shape: {df_second.shape[0]} rows × {df_second.shape[1]} columns")
         
-        # Process Second Group data
-        for index, row in df_second.iterrows():
-            # Skip empty rows
-            if pd.isna(row[0]) and pd.isna(row[1]):
-                continue
-                
-            second_code = str(row[0]) if not pd.isna(row[0]) else ""
-            second_name = str(row[1]) if not pd.isna(row[1]) else ""
-            
-            # Full format for display
-            item = {
-                "Second Group Code": second_code,
-                "Second Group Name": second_name
-            }
-            second_group_list.append(item)
-            
-            # Compact format for API
-            compact_item = create_compact_item(second_code, second_name)
-            second_group_compact.append(compact_item)
-            
-            # Increment counter
-            second_group_count += 1
+        # Process Second Group data: full format for display, compact format for API
+        second_rows = _read_code_name_rows(df_second)
+        code_key, name_key = compact_item_keys()
+        second_group_list = [{"Second Group Code": code, "Second Group Name": name}
+                             for code, name in second_rows]
+        second_group_compact = [{code_key: code, name_key: name} for code, name in second_rows]
+        second_group_count = len(second_rows)
         
         print(f"{Fore.GREEN}[+] Processed {second_group_count} items from Second Group")
         
@@ -296,6 +289,15 @@ def SendInputParts(excel_path: str = None,
         return None
 
 
+def _orjson_default(obj):
+    """Serialize int/float subclasses (e.g. numpy scalars) like the stdlib encoder does"""
+    if isinstance(obj, float):
+        return float(obj)
+    if isinstance(obj, int):
+        return int(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
 def SaveResults(results: Dict, output_path: str = None) -> bool:
     """
     Save mapping results to JSON file and DataFrames to Excel.
@@ -332,8 +334,17 @@ def SaveResults(results: Dict, output_path: str = None) -> bool:
             "abbreviate_keys": Config.abbreviate_keys
         }
         
-        with open(json_output_path, 'w', encoding='utf-8') as f:
-            json.dump(json_results, f, ensure_ascii=False, indent=2)
+        # Serialize before opening the file so a failure leaves no empty file behind
+        if orjson is not None:
+            json_bytes = orjson.dumps(
+                json_results,
+                default=_orjson_default,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            )
+        else:
+            json_bytes = json.dumps(json_results, ensure_ascii=False, indent=2).encode('utf-8')
+        with open(json_output_path, 'wb') as f:
+            f.write(json_bytes)
         
         print(f"\n{Fore.GREEN}[+] JSON results saved to: {json_output_path}")
         
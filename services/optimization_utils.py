@@ -1,29 +1,24 @@
 # optimization_utils.py
-from typing import Dict
+from typing import Dict, Tuple
 from core.config import Config
 from core.logger import get_logger
 
 logger = get_logger(__name__)
 
-def create_compact_item(code: str, name: str) -> Dict:
-    """Create compact JSON item to minimize tokens"""
-    # Removed debug log - creates excessive log bloat (logged for every item created)
+def compact_item_keys() -> Tuple[str, str]:
+    """Return the (code, name) keys used in compact JSON items"""
     if Config.abbreviate_keys:
-        return {"c": code, "n": name}  # c=code, n=name
-    else:
-        return {"code": code, "name": name}
+        return "c", "n"  # c=code, n=name
+    return "code", "name"
 
-def expand_compact_result(item: Dict, group_type: str = "first") -> Dict:
-    """Expand compact result back to full format"""
-    # Removed debug log - creates excessive log bloat (logged 100+ times per batch)
-    if Config.abbreviate_keys:
-        if group_type == "mapping":
-            return {
-                "First Group Code": item.get("fc", item.get("firstCode", "")),
-                "First Group Name": item.get("fn", item.get("firstName", "")),
-                "Second Group Code": item.get("sc", item.get("secondCode", None)),
-                "Second Group Name": item.get("sn", item.get("secondName", None)),
-                "similarity score": item.get("s", item.get("score", 0)),
-                "reason for similarity score": item.get("r", item.get("reason", ""))
-            }
-    return item
\ No newline at end of file
+def expand_compact_mapping(item: Dict) -> Dict:
+    """Expand one mapping result with abbreviated keys back to full format"""
+    get = item.get
+    return {
+        "First Group Code": get("fc", get("firstCode", "")),
+        "First Group Name": get("fn", get("firstName", "")),
+        "Second Group Code": get("sc", get("secondCode", None)),
+        "Second Group Name": get("sn", get("secondName", None)),
+        "similarity score": get("s", get("score", 0)),
+        "reason for similarity score": get("r", get("reason", ""))
+    }
\ No newline at end of file
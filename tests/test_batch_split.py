@@ -0,0 +1,93 @@
+"""
+Tests for the batch planning in services/batch_dispatcher.py
+"""
+
+import math
+import unittest
+
+from services.batch_dispatcher import calculate_optimal_batch_split, get_block, iter_batches
+
+
+def baseline_split(n1: int, n2: int, max_batch_size: int):
+    """Original loop-based split search, kept as the reference tie-break order"""
+    best_f, best_s = 0, 0
+    min_batches = float('inf')
+
+    for f in range(1, max_batch_size):
+        s = max_batch_size - f
+        total_batches = math.ceil(n1 / f) * math.ceil(n2 / s)
+
+        if total_batches < min_batches:
+            min_batches = total_batches
+            best_f, best_s = f, s
+        elif total_batches == min_batches:
+            current_diff = abs(best_f - best_s)
+            new_diff = abs(f - s)
+            if new_diff < current_diff:
+                best_f, best_s = f, s
+            elif new_diff == current_diff:
+                current_remainder = (n1 % best_f) + (n2 % best_s)
+                new_remainder = (n1 % f) + (n2 % s)
+                if new_remainder < current_remainder:
+                    best_f, best_s = f, s
+                elif new_remainder == current_remainder and s > best_s:
+                    best_f, best_s = f, s
+
+    return best_f, best_s, min_batches
+
+
+class BatchSplitTests(unittest.TestCase):
+
+    def assert_matches_baseline(self, n1, n2, max_batch_size):
+        plan = calculate_optimal_batch_split(n1, n2, max_batch_size)
+        self.assertEqual(
+            (plan["f"], plan["s"], plan["total_batches"]),
+            baseline_split(n1, n2, max_batch_size),
+            f"n1={n1}, n2={n2}, max_batch_size={max_batch_size}"
+        )
+
+    def test_small_inputs_match_baseline(self):
+        for max_batch_size in range(2, 13):
+            for n1 in range(1, 31):
+                for n2 in range(1, 31):
+                    self.assert_matches_baseline(n1, n2, max_batch_size)
+
+    def test_medium_inputs_match_baseline(self):
+        for max_batch_size in (50, 128, 200):
+            for n1 in range(1, 600, 37):
+                for n2 in range(1, 600, 41):
+                    self.assert_matches_baseline(n1, n2, max_batch_size)
+
+    def test_large_inputs_match_baseline(self):
+        for n1, n2 in ((1000, 1000), (2500, 731), (10000, 40), (40, 10000), (9973, 7919)):
+            for max_batch_size in (100, 200, 400):
+                self.assert_matches_baseline(n1, n2, max_batch_size)
+
+    def test_blocks_cover_every_row_once(self):
+        plan = calculate_optimal_batch_split(95, 47, 40)
+        for group, n in (("first", 95), ("second", 47)):
+            blocks = [get_block(plan, group, i) for i in range(1, plan[f"b{1 if group == 'first' else 2}"] + 1)]
+            self.assertEqual(blocks[0]["start"], 1)
+            self.assertEqual(blocks[-1]["end"], n)
+            for previous, block in zip(blocks, blocks[1:]):
+                self.assertEqual(block["start"], previous["end"] + 1)
+
+    def test_get_block_rejects_out_of_range_index(self):
+        plan = calculate_optimal_batch_split(10, 10, 10)
+        with self.assertRaises(IndexError):
+            get_block(plan, "first", 0)
+        with self.assertRaises(IndexError):
+            get_block(plan, "first", plan["b1"] + 1)
+
+    def test_iter_batches_yields_every_block_pair(self):
+        plan = calculate_optimal_batch_split(25, 12, 10)
+        batches = list(iter_batches(plan))
+        self.assertEqual(len(batches), plan["total_batches"])
+        self.assertEqual([b["batch_index"] for b in batches], list(range(1, len(batches) + 1)))
+        self.assertEqual(batches[0]["first_range"], [1, plan["f"]])
+        self.assertEqual(batches[-1]["first_range"][1], 25)
+        self.assertEqual(batches[-1]["second_range"][1], 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+Tests for api/cache.py - cache keys and the LRU result cache
+"""
+
+import unittest
+
+from api.cache import MappingCache, make_cache_key
+
+
+class MakeCacheKeyTests(unittest.TestCase):
+
+    def test_part_boundaries_are_unambiguous(self):
+        self.assertNotEqual(make_cache_key("a", "bc"), make_cache_key("ab", "c"))
+        self.assertNotEqual(make_cache_key(b"a", b"bc"), make_cache_key(b"ab", b"c"))
+
+    def test_part_types_are_distinguished(self):
+        self.assertNotEqual(make_cache_key("abc"), make_cache_key(b"abc"))
+        self.assertNotEqual(make_cache_key("1"), make_cache_key(1))
+
+    def test_same_inputs_give_same_key(self):
+        self.assertEqual(
+            make_cache_key([{"c": "1", "n": "x"}], "prompt", 0.2),
+            make_cache_key([{"c": "1", "n": "x"}], "prompt", 0.2)
+        )
+
+    def test_dict_key_order_does_not_matter(self):
+        self.assertEqual(make_cache_key({"a": 1, "b": 2}), make_cache_key({"b": 2, "a": 1}))
+
+
+class MappingCacheTests(unittest.TestCase):
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = MappingCache(max_entries=2)
+        cache.put("a", {"v": 1})
+        cache.put("b", {"v": 2})
+        cache.get("a")
+        cache.put("c", {"v": 3})
+        self.assertEqual(cache.get("a"), {"v": 1})
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+    def test_expired_entry_is_a_miss(self):
+        cache = MappingCache(max_entries=2, ttl_seconds=-1)
+        cache.put("a", {"v": 1})
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.misses, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
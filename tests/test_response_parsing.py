@@ -0,0 +1,67 @@
+"""
+Tests for parse_optimized_response() - recovering mappings from model output
+"""
+
+import unittest
+
+from api.client import parse_optimized_response
+
+
+MAPPING_A = {"fc": "A1", "fn": "Glucose", "sc": "B1", "sn": "Glu", "s": 95, "r": "same test"}
+MAPPING_B = {"fc": "A2", "fn": "Sodium", "sc": None, "sn": None, "s": 10, "r": "no match"}
+
+
+class ParseOptimizedResponseTests(unittest.TestCase):
+
+    def test_plain_json_object(self):
+        text = '{"mappings": [{"fc": "A1", "fn": "Glucose", "sc": "B1", "sn": "Glu", "s": 95, "r": "same test"}]}'
+        self.assertEqual(parse_optimized_response(text, True, False), [MAPPING_A])
+
+    def test_plain_json_array(self):
+        text = '[{"fc": "A1", "fn": "Glucose", "sc": "B1", "sn": "Glu", "s": 95, "r": "same test"}]'
+        self.assertEqual(parse_optimized_response(text, True, False), [MAPPING_A])
+
+    def test_fenced_json_block(self):
+        text = (
+            "Here are the results:\n"
+            "```json\n"
+            '{"mappings": [{"fc": "A1", "fn": "Glucose", "sc": "B1", "sn": "Glu", "s": 95, "r": "same test"}]}\n'
+            "```\n"
+        )
+        self.assertEqual(parse_optimized_response(text, True, False), [MAPPING_A])
+
+    def test_fenced_block_without_language(self):
+        text = '```\n[{"fc": "A2", "fn": "Sodium", "sc": null, "sn": null, "s": 10, "r": "no match"}]\n```'
+        self.assertEqual(parse_optimized_response(text, True, False), [MAPPING_B])
+
+    def test_object_embedded_in_text(self):
+        text = (
+            'Sure! {"mappings": [{"fc": "A1", "fn": "Glucose", "sc": "B1", "sn": "Glu", "s": 95, '
+            '"r": "same test"}]} Let me know if you need anything else {not json}.'
+        )
+        self.assertEqual(parse_optimized_response(text, True, False), [MAPPING_A])
+
+    def test_truncated_response_keeps_complete_mappings(self):
+        text = (
+            '{"mappings": [{"fc": "A1", "fn": "Glucose", "sc": "B1", "sn": "Glu", "s": 95, "r": "same test"}, '
+            '{"fc": "A2", "fn": "Sodium", "sc": null, "sn": null, "s": 10, "r": "no match"}, '
+            '{"fc": "A3", "fn": "Potas'
+        )
+        self.assertEqual(parse_optimized_response(text, True, False), [MAPPING_A, MAPPING_B])
+
+    def test_truncated_direct_array(self):
+        text = '[{"fc": "A1", "fn": "Glucose", "sc": "B1", "sn": "Glu", "s": 95, "r": "same test"}, {"fc": "A2"'
+        self.assertEqual(parse_optimized_response(text, True, False), [MAPPING_A])
+
+    def test_empty_mappings_array(self):
+        self.assertEqual(parse_optimized_response('{"mappings": []}', True, False), [])
+
+    def test_unparseable_response(self):
+        self.assertIsNone(parse_optimized_response("I could not map these items.", True, False))
+
+    def test_truncated_before_first_mapping(self):
+        self.assertIsNone(parse_optimized_response('{"mappings": [{"fc": "A1", "fn": "Glu', True, False))
+
+
+if __name__ == "__main__":
+    unittest.main()
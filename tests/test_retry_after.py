@@ -0,0 +1,55 @@
+"""
+Tests for get_retry_after() - reading server wait hints from API errors
+"""
+
+import unittest
+from types import SimpleNamespace
+
+from api.utils import get_retry_after
+
+
+def error_with_headers(headers):
+    """Build an exception carrying a response with the given headers"""
+    error = Exception("rate limited")
+    error.response = SimpleNamespace(headers=headers)
+    return error
+
+
+class GetRetryAfterTests(unittest.TestCase):
+
+    def test_retry_after_ms(self):
+        self.assertEqual(get_retry_after(error_with_headers({"retry-after-ms": "1500"})), 1.5)
+
+    def test_retry_after_seconds(self):
+        self.assertEqual(get_retry_after(error_with_headers({"retry-after": "20"})), 20.0)
+
+    def test_retry_after_ms_takes_precedence(self):
+        headers = {"retry-after-ms": "250", "retry-after": "20"}
+        self.assertEqual(get_retry_after(error_with_headers(headers)), 0.25)
+
+    def test_http_date_falls_back_to_reset_headers(self):
+        headers = {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT", "x-ratelimit-reset-tokens": "3s"}
+        self.assertEqual(get_retry_after(error_with_headers(headers)), 3.0)
+
+    def test_reset_durations(self):
+        cases = {"1s": 1.0, "6m0s": 360.0, "20ms": 0.02, "1h2m3s": 3723.0, "1.5s": 1.5, "7": 7.0}
+        for value, expected in cases.items():
+            with self.subTest(value=value):
+                headers = {"x-ratelimit-reset-requests": value}
+                self.assertAlmostEqual(get_retry_after(error_with_headers(headers)), expected)
+
+    def test_longest_reset_wins(self):
+        headers = {"x-ratelimit-reset-requests": "2s", "x-ratelimit-reset-tokens": "1m"}
+        self.assertEqual(get_retry_after(error_with_headers(headers)), 60.0)
+
+    def test_invalid_reset_duration_is_zero(self):
+        headers = {"x-ratelimit-reset-tokens": "soon"}
+        self.assertEqual(get_retry_after(error_with_headers(headers)), 0.0)
+
+    def test_no_response_or_headers(self):
+        self.assertEqual(get_retry_after(Exception("boom")), 0.0)
+        self.assertEqual(get_retry_after(error_with_headers({})), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,6 @@ import streamlit as st
 import pandas as pd
 import io
 import sys
-import time
 import json
 import base64
 from datetime import datetime
@@ -329,26 +328,36 @@ class StreamlitConsoleCapture:
         import re
         clean_text = re.sub(r'\x1b\[[0-9;]*m', '', text)
 
-        # Capture for Streamlit
-        if clean_text.strip():
+        # Capture for Streamlit, one console entry per line so callers can
+        # write a whole block at once
+        timestamp = None
+        for line in clean_text.splitlines():
+            if not line.strip():
+                continue
+
             # Add timestamp
-            timestamp = datetime.now().strftime("%H:%M:%S")
+            if timestamp is None:
+                timestamp = datetime.now().strftime("%H:%M:%S")
 
             # Determine log type for styling
+            lower_line = line.lower()
             log_class = "log-info"
-            if "error" in clean_text.lower() or "failed" in clean_text.lower():
+            if "error" in lower_line or "failed" in lower_line:
                 log_class = "log-error"
-            elif "success" in clean_text.lower() or "completed" in clean_text.lower() or "[+]" in clean_text:
+            elif "success" in lower_line or "completed" in lower_line or "[+]" in line:
                 log_class = "log-success"
-            elif "warning" in clean_text.lower() or "[!]" in clean_text:
+            elif "warning" in lower_line or "[!]" in line:
                 log_class = "log-warning"
 
-            formatted_line = f'<span class="log-time">[{timestamp}]</span> <span class="{log_class}">{clean_text}</span>'
+            formatted_line = f'<span class="log-time">[{timestamp}]</span> <span class="{log_class}">{line}</span>'
             self.output.append(formatted_line)
 
-            # Build terminal HTML
-            terminal_html = self._build_terminal_html()
-            self.text_element.markdown(terminal_html, unsafe_allow_html=True)
+        if timestamp is None:
+            return
+
+        # Build terminal HTML once per write, not once per line
+        terminal_html = self._build_terminal_html()
+        self.text_element.markdown(terminal_html, unsafe_allow_html=True)
 
     def _build_terminal_html(self):
         """Build styled terminal HTML output"""
@@ -961,7 +970,6 @@ def main():
                     update_stage(stage1_placeholder, 1, "Initializing & Loading Data", "active")
                     status_placeholder.markdown('<span class="status-badge running">Initializing...</span>', unsafe_allow_html=True)
                     progress_bar.progress(10)
-                    time.sleep(0.5)
                     update_stage(stage1_placeholder, 1, "Initializing & Loading Data", "completed")
 
                     # Stage 2: Preparing
@@ -1005,7 +1013,7 @@ def main():
                             display_stats = {
                                 'batches_completed': batch_meta.get('batches_processed', 0),
                                 'total_batches': batch_meta.get('total_batches', 0),
-                                'avg_batch_time': 0,  # Would need to track this
+                                'avg_batch_time': batch_meta.get('avg_batch_seconds') or 0,
                                 'total_mappings': len(results.get("mappings", [])),
                                 'mapped_count': stats.get("mapped_count", 0),
                                 'unmapped_count': stats.get("unmapped_count", 0),
@@ -4,7 +4,6 @@ components/processing_tab.py - Processing tab with stages and live output
 
 import streamlit as st
 import sys
-import time
 import tempfile
 import os
 from core.config import Config
@@ -150,7 +149,6 @@ def render_processing_tab():
                 update_stage(stage1_placeholder, 1, "Initializing & Loading Data", "active")
                 status_placeholder.markdown('<span class="status-badge running">Initializing...</span>', unsafe_allow_html=True)
                 progress_bar.progress(10)
-                time.sleep(0.5)
                 update_stage(stage1_placeholder, 1, "Initializing & Loading Data", "completed")
 
                 # Stage 2: Preparing
@@ -9,6 +9,54 @@ from datetime import datetime
 from typing import List
 from core.prompts import Prompts
 
+# ANSI color codes stripped from captured console output
+_ANSI_RE = re.compile(r'\x1b\[[0-9;]*m')
+
+# Verbose log messages hidden from the Streamlit console (token usage,
+# parameters, mapping statistics, configuration), combined into one pattern
+_FILTERED_LINE_RE = re.compile('|'.join([
+    # Configuration details
+    r'Current Configuration',
+    r'Provider: OpenAI',
+    r'Model: gpt',
+    r'Temperature:',
+    r'Top P:',
+    r'Max Tokens:',
+    r'Threshold: \d+%',
+    r'Batch Size:',
+    r'Wait Between Batches:',
+    r'Use Compact JSON:',
+    r'Abbreviate Keys:',
+    r'^={10,}$',  # Lines with only equals signs
+    r'Calling OpenAI API\.\.\.',
+
+    # Deduplication details
+    r'Processing Mapping Results with Deduplication',
+    r'Using Parameters:',
+    r'Deduplication Summary:',
+    r'• Total mappings received:',
+    r'• New mappings added:',
+    r'• Mappings updated \(better score\):',
+    r'• Duplicates ignored:',
+    r'• Total unique mappings:',
+    r'• Threshold:',
+
+    # Old patterns (kept for backward compatibility)
+    r'Token Usage:',
+    r'• Input tokens:',
+    r'• Output tokens:',
+    r'• Total tokens:',
+    r'Parameters Used:',
+    r'Mapping Statistics:',
+    r'• Mapped items:',
+    r'• Unmapped items:',
+    r'• Average similarity score:',
+    r'• Above threshold',
+    r'• Below threshold'
+]))
+
+_BATCH_COMPLETE_RE = re.compile(r'Batch (\d+) of (\d+) completed successfully')
+
 
 class StreamlitConsoleCapture:
     """Capture console output for Streamlit display with terminal styling"""
@@ -37,54 +85,12 @@ class StreamlitConsoleCapture:
         self.old_stdout.write(text)
 
         # Remove ANSI color codes for display
-        clean_text = re.sub(r'\x1b\[[0-9;]*m', '', text)
+        clean_text = _ANSI_RE.sub('', text)
 
         # Capture for Streamlit
         if clean_text.strip():
-            # Filter out verbose log messages (token usage, parameters, mapping statistics, configuration)
-            filtered_patterns = [
-                # Configuration details
-                r'Current Configuration',
-                r'Provider: OpenAI',
-                r'Model: gpt',
-                r'Temperature:',
-                r'Top P:',
-                r'Max Tokens:',
-                r'Threshold: \d+%',
-                r'Batch Size:',
-                r'Wait Between Batches:',
-                r'Use Compact JSON:',
-                r'Abbreviate Keys:',
-                r'^={10,}$',  # Lines with only equals signs
-                r'Calling OpenAI API\.\.\.',
-
-                # Deduplication details
-                r'Processing Mapping Results with Deduplication',
-                r'Using Parameters:',
-                r'Deduplication Summary:',
-                r'• Total mappings received:',
-                r'• New mappings added:',
-                r'• Mappings updated \(better score\):',
-                r'• Duplicates ignored:',
-                r'• Total unique mappings:',
-                r'• Threshold:',
-
-                # Old patterns (kept for backward compatibility)
-                r'Token Usage:',
-                r'• Input tokens:',
-                r'• Output tokens:',
-                r'• Total tokens:',
-                r'Parameters Used:',
-                r'Mapping Statistics:',
-                r'• Mapped items:',
-                r'• Unmapped items:',
-                r'• Average similarity score:',
-                r'• Above threshold',
-                r'• Below threshold'
-            ]
-
             # Skip this line if it matches any filtered pattern
-            if any(re.search(pattern, clean_text) for pattern in filtered_patterns):
+            if _FILTERED_LINE_RE.search(clean_text):
                 return
 
             # Track batch completions for metrics
@@ -165,7 +171,7 @@ class StreamlitConsoleCapture:
             text: Log message text to parse
         """
         # Look for "Batch X of Y completed successfully"
-        batch_complete_match = re.search(r'Batch (\d+) of (\d+) completed successfully', text)
+        batch_complete_match = _BATCH_COMPLETE_RE.search(text)
         if batch_complete_match:
             current_batch = int(batch_complete_match.group(1))
             total_batches = int(batch_complete_match.group(2))